@@ -0,0 +1,96 @@
+"""
+Check the indexed Coveralls page matcher against the original regex loop and time both
+
+Usage: python -m benchmarks.coveralls_matcher
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.coverage_matchers import find_coveralls_coverage
+
+CORPUS_DIR = Path(__file__).parent / "corpus" / "coveralls"
+
+# The pattern list extract_coverage_from_coveralls used before the context index
+LEGACY_PATTERNS = [
+    r'<div class="coverageText repo-coverage-outline[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%',
+    r'id="repoShowPercentage"[^>]*>\s*(\d+(?:\.\d+)?)%',
+    r"<div[^>]*>\s*(\d+(?:\.\d+)?)%\s*</div>",
+    r'class="[^"]*coverage[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%',
+    r">(\d+(?:\.\d+)?)%<",
+    r"(\d+(?:\.\d+)?)%",
+]
+LEGACY_BROAD_PATTERNS = [r">(\d+(?:\.\d+)?)%<", r"(\d+(?:\.\d+)?)%"]
+
+
+def legacy_find_coverage(content: str) -> Optional[float]:
+    """The original page scan, with a fresh context search per candidate"""
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, content):
+            coverage = float(match)
+            if 0 <= coverage <= 100:
+                if pattern in LEGACY_BROAD_PATTERNS:
+                    coverage_context = re.search(
+                        rf".{{0,100}}(?:coverage|covered|cover).{{0,100}}{re.escape(match)}%|{re.escape(match)}%.{{0,100}}(?:coverage|covered|cover)",
+                        content,
+                        re.IGNORECASE,
+                    )
+                    if coverage_context:
+                        return coverage
+                else:
+                    return coverage
+    return None
+
+
+def large_page(rows: int) -> str:
+    """A build page listing many source files, with the summary only at the bottom"""
+    lines = ["<html><body><table class='source-files'>"]
+    for i in range(rows):
+        percentage = f"{(i * 37) % 1000 / 10:.1f}"
+        lines.append(
+            f"<tr><td>src/module_{i}/file_{i}.js</td><td>>{percentage}%<</td>"
+            f"<td>{i * 13 % 900} relevant lines, {i % 7} branches</td></tr>"
+        )
+    lines.append("</table>")
+    lines.append("<p>Total line coverage across this build: 88.2%</p></body></html>")
+    return "\n".join(lines)
+
+
+def time_once(fn, content: str) -> tuple[Optional[float], float]:
+    start = time.perf_counter()
+    result = fn(content)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    pages = {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(CORPUS_DIR.glob("*.html"))
+    }
+    for rows in (500, 2000):
+        pages[f"generated-{rows}-rows"] = large_page(rows)
+
+    mismatches = 0
+    for name, content in pages.items():
+        expected, legacy_time = time_once(legacy_find_coverage, content)
+        actual, indexed_time = time_once(find_coveralls_coverage, content)
+        status = "ok" if expected == actual else "MISMATCH"
+        if expected != actual:
+            mismatches += 1
+        print(
+            f"{status:8} {name}: {actual} "
+            f"(legacy {legacy_time * 1000:.1f} ms, indexed {indexed_time * 1000:.1f} ms)"
+        )
+
+    if mismatches:
+        print(f"\n✗ {mismatches} pages differ from the legacy matcher")
+        return 1
+    print(f"\n✓ {len(pages)} pages match the legacy matcher")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Checks adaptive timeouts and circuit breakers against a replay server with a broken host
+
+Scenarios (each runs main() in a scratch directory, against synthetic fixtures):
+    error  coveralls.io answers 503 from the start: its breaker must open, and no repo
+           that a healthy run finds on Coveralls may be saved as "no coverage", even
+           those checked before the breaker opened
+    hang   coveralls.io is healthy, then stops answering: requests must give up after
+           the adaptive (p99-based) timeout instead of the fixed 30s
+
+Usage: python -m benchmarks.fault_injection [--scenario error|hang]
+"""
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from benchmarks.fixtures import build_fixtures
+from benchmarks.replay_server import ReplayServer
+from src.extract_coverage import NO_COVERAGE_ERROR
+from src.host_health import FAILURE_THRESHOLD, UNAVAILABLE_ERROR_PREFIX
+from src.http_client import enable_replay, get_host_health_stats
+
+BROKEN_HOST = "coveralls.io"
+REPOS = 60
+WORKERS = 4
+HANG_SECONDS = 20.0
+
+
+def run_main(repos: int) -> tuple[float, list[dict[str, Any]]]:
+    """Run main() for `repos` more repos in the current directory"""
+    import main as entry_point  # pylint: disable=import-outside-toplevel
+
+    previous_argv = sys.argv
+    sys.argv = [
+        "main.py",
+        "--count",
+        str(repos),
+        "--workers",
+        str(WORKERS),
+        "--no-cache",
+        "--deterministic",
+    ]
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            entry_point.main()
+        seconds = time.perf_counter() - start
+    finally:
+        sys.argv = previous_argv
+    with open("coverage_results.jsonl", "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    return seconds, records
+
+
+def check(ok: bool, message: str) -> bool:
+    print(f"  {'✓' if ok else '✗'} {message}")
+    return ok
+
+
+def scenario_error(server: ReplayServer) -> bool:
+    # Where each repo's coverage comes from while every host is healthy
+    os.mkdir("healthy")
+    os.chdir("healthy")
+    try:
+        _, healthy = run_main(REPOS)
+    finally:
+        os.chdir("..")
+    on_coveralls = {
+        r["repo"] for r in healthy if (r["source"] or "").startswith("Coveralls")
+    }
+
+    server.faults[BROKEN_HOST] = "error"
+    seconds, records = run_main(REPOS)
+    unavailable = [
+        r for r in records if (r["error"] or "").startswith(UNAVAILABLE_ERROR_PREFIX)
+    ]
+    missed = [
+        r["repo"]
+        for r in records
+        if r["repo"] in on_coveralls and r["error"] == NO_COVERAGE_ERROR
+    ]
+    wrong = [r for r in records if r["source"] and r["source"].startswith("Coveralls")]
+    stats, open_hosts = get_host_health_stats()
+    print(
+        f"error: {len(records)} repos in {seconds:.1f}s, {len(unavailable)} unavailable, "
+        f"{server.stats.faulted} requests reached {BROKEN_HOST}"
+    )
+    results = [
+        check(BROKEN_HOST in open_hosts, f"{BROKEN_HOST} breaker is open"),
+        check(stats.rejected > 0, f"{stats.rejected} requests were not sent"),
+        check(bool(on_coveralls), f"{len(on_coveralls)} repos need Coveralls"),
+        check(
+            not missed,
+            f"{len(missed)} repos needing Coveralls were saved as having no coverage",
+        ),
+        check(not wrong, "no result claims a Coveralls figure"),
+        check(
+            # Each failing request is retried by urllib3 before it counts once
+            server.stats.faulted <= (FAILURE_THRESHOLD + WORKERS) * 4,
+            f"{BROKEN_HOST} saw {server.stats.faulted} requests, not one per lookup",
+        ),
+    ]
+    return all(results)
+
+
+def scenario_hang(server: ReplayServer) -> bool:
+    warm_seconds, warm = run_main(REPOS)
+    print(f"hang: warmed up on {len(warm)} repos in {warm_seconds:.1f}s")
+    server.faults[BROKEN_HOST] = "hang"
+    seconds, records = run_main(REPOS)
+    stats, open_hosts = get_host_health_stats()
+    print(
+        f"hang: {len(records) - len(warm)} repos in {seconds:.1f}s with "
+        f"{BROKEN_HOST} hanging for {HANG_SECONDS:g}s per request"
+    )
+    results = [
+        check(
+            seconds < HANG_SECONDS * 2,
+            f"run took {seconds:.1f}s, below two full hangs ({HANG_SECONDS * 2:g}s)",
+        ),
+        check(BROKEN_HOST in open_hosts, f"{BROKEN_HOST} breaker is open"),
+        check(stats.trips >= 1, f"{stats.trips} breaker trips"),
+    ]
+    return all(results)
+
+
+SCENARIOS = {"error": scenario_error, "hang": scenario_hang}
+
+
+def run_scenario(name: str) -> bool:
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as fixtures, tempfile.TemporaryDirectory() as scratch:
+        build_fixtures(fixtures, REPOS * 2)
+        server = ReplayServer(fixtures, latency_ms=2, hang_seconds=HANG_SECONDS).start()
+        enable_replay(server.base_url)
+        os.chdir(scratch)
+        try:
+            return SCENARIOS[name](server)
+        finally:
+            os.chdir(previous_dir)
+            enable_replay(None)
+            server.shutdown()
+            server.server_close()
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if "--scenario" in args:
+        return 0 if run_scenario(args[args.index("--scenario") + 1]) else 1
+
+    # Breaker state lives for the whole process, so every scenario gets its own
+    failed = [
+        name
+        for name in SCENARIOS
+        if subprocess.run(
+            [sys.executable, "-m", "benchmarks.fault_injection", "--scenario", name],
+            check=False,
+        ).returncode
+    ]
+    if failed:
+        print(f"\n✗ Failed: {', '.join(failed)}")
+        return 1
+    print("\n✓ All fault injection scenarios passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Synthetic replay fixtures for a run over N repos, built from the benchmark corpus
+
+Usage: python -m benchmarks.fixtures OUTPUT_DIR [REPOS]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from src.coverage_matchers import CODECOV_BADGE, iter_readme_candidates
+from src.coverage_sources import CODECOV_API
+from src.http_replay import Fixture, save_fixture
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+LANGUAGES = ["Python", "Go", "TypeScript", "Rust", "Java", "Ruby"]
+
+
+def _corpus(kind: str, pattern: str) -> list[str]:
+    return [
+        path.read_text(encoding="utf-8")
+        for path in sorted((CORPUS_DIR / kind).glob(pattern))
+    ]
+
+
+def search_url(page: int, min_stars: int = 1000) -> str:
+    # Must match the URL iter_top_repos builds for the first 10 pages
+    return (
+        f"https://api.github.com/search/repositories?q=stars:>{min_stars}"
+        f"&sort=stars&order=desc&page={page}&per_page=100"
+    )
+
+
+def build_fixtures(directory: str, repos: int = 200) -> int:
+    """Write fixtures for `repos` search results and each repo's lookups"""
+    readmes = _corpus("readmes", "*.md")
+    coveralls_pages = _corpus("coveralls", "*.html")
+    written = 0
+
+    def save(url: str, status: int, body: str, content_type: str) -> None:
+        nonlocal written
+        save_fixture(
+            directory, Fixture(url, status, {"Content-Type": content_type}, body)
+        )
+        written += 1
+
+    items = [
+        {
+            "owner": {"login": f"bench-owner{i}"},
+            "name": f"bench-repo{i}",
+            "stargazers_count": 500000 - i * 37,
+            "language": LANGUAGES[i % len(LANGUAGES)],
+            "clone_url": f"https://github.com/bench-owner{i}/bench-repo{i}.git",
+        }
+        for i in range(repos)
+    ]
+    for page in range(1, (repos + 99) // 100 + 1):
+        page_items = items[(page - 1) * 100 : page * 100]
+        save(
+            search_url(page),
+            200,
+            json.dumps({"total_count": repos, "items": page_items}),
+            "application/json; charset=utf-8",
+        )
+
+    for i, item in enumerate(items):
+        repo_api = (
+            f"https://api.github.com/repos/{item['owner']['login']}/{item['name']}"
+        )
+        save(
+            f"{repo_api}/languages",
+            200,
+            json.dumps({item["language"]: 40000 + i * 1000, "Shell": 1200}),
+            "application/json; charset=utf-8",
+        )
+        # Every fifth repo has no README, so the Coveralls fallback gets exercised
+        if i % 5 == 4:
+            save(
+                f"{repo_api}/readme",
+                404,
+                '{"message": "Not Found"}',
+                "application/json",
+            )
+        else:
+            save(
+                f"{repo_api}/readme",
+                200,
+                readmes[i % len(readmes)],
+                "text/plain; charset=utf-8",
+            )
+        # Half of those answer from the Coveralls JSON API, the rest need the scraper
+        coveralls = (
+            f"https://coveralls.io/github/{item['owner']['login']}/{item['name']}"
+        )
+        if i % 10 == 4:
+            save(
+                f"{coveralls}.json",
+                200,
+                json.dumps(
+                    {
+                        "url": f"/github/{item['owner']['login']}/{item['name']}",
+                        "branch": "main",
+                        "covered_percent": 60 + i % 40 + 0.25,
+                    }
+                ),
+                "application/json; charset=utf-8",
+            )
+        else:
+            save(f"{coveralls}.json", 404, "{}", "application/json")
+        save(
+            f"{CODECOV_API}/{item['owner']['login']}/repos/{item['name']}/",
+            404,
+            '{"detail": "Not found."}',
+            "application/json",
+        )
+        save(
+            coveralls,
+            200,
+            coveralls_pages[i % len(coveralls_pages)],
+            "text/html; charset=utf-8",
+        )
+
+    badges = {
+        value
+        for readme in readmes
+        for kind, value in iter_readme_candidates(readme.lower())
+        if kind == CODECOV_BADGE
+    }
+    for value in sorted(badges):
+        owner, _, name = value.partition("/")
+        save(
+            f"{CODECOV_API}/{owner}/repos/{name}/",
+            200,
+            json.dumps(
+                {
+                    "name": name,
+                    "language": "python",
+                    "totals": {"files": 40, "lines": 5210, "coverage": 91.37},
+                }
+            ),
+            "application/json",
+        )
+        save(
+            f"https://img.shields.io/codecov/c/github/{value}.svg",
+            200,
+            '<svg xmlns="http://www.w3.org/2000/svg"><text>91%</text></svg>',
+            "image/svg+xml",
+        )
+    return written
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    repos = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    written = build_fixtures(sys.argv[1], repos)
+    print(f"Wrote {written} fixtures for {repos} repos to {sys.argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
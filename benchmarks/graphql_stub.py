@@ -0,0 +1,141 @@
+"""
+Local stand-in for the GitHub GraphQL endpoint, serving READMEs from the benchmark corpus
+
+Usage:
+    python -m benchmarks.graphql_stub [PORT]   # then GITHUB_GRAPHQL_URL=http://127.0.0.1:PORT/graphql
+    python -m benchmarks.graphql_stub --check  # fetch a few batches through the stub and verify them
+"""
+
+import hashlib
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from src import graphql_fetcher
+from src.graphql_fetcher import README_PATHS, fetch_repo_details
+from src.models import RepoInfo
+
+CORPUS_DIR = Path(__file__).parent / "corpus" / "readmes"
+READMES = [path.read_text(encoding="utf-8") for path in sorted(CORPUS_DIR.glob("*.md"))]
+
+ALIAS = re.compile(r"(r\d+): repository\(owner: \$(o\d+), name: \$(n\d+)\)")
+
+
+def stub_repository(owner: str, name: str) -> Optional[dict]:
+    """Deterministic repository node; names starting with "missing" do not exist"""
+    if name.startswith("missing"):
+        return None
+    digest = int(hashlib.sha256(f"{owner}/{name}".encode("utf-8")).hexdigest(), 16)
+    node = {
+        "pushedAt": "2026-01-01T00:00:00Z",
+        "isArchived": digest % 7 == 0,
+        "repositoryTopics": {"nodes": [{"topic": {"name": "testing"}}]},
+        "languages": {
+            "edges": [
+                {"size": digest % 400000, "node": {"name": "Python"}},
+                {"size": digest % 9000, "node": {"name": "Shell"}},
+            ]
+        },
+    }
+    # Some repos keep their README under a name the batch query does not ask for
+    readme_slot = digest % (len(README_PATHS) + 1)
+    for i in range(len(README_PATHS)):
+        text = READMES[digest % len(READMES)] if i == readme_slot else None
+        node[f"readme{i}"] = {"text": text} if text is not None else None
+    return node
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_served = 0
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        variables = payload.get("variables") or {}
+        data = {}
+        errors = []
+        for alias, owner_var, name_var in ALIAS.findall(payload.get("query", "")):
+            owner, name = variables[owner_var], variables[name_var]
+            data[alias] = stub_repository(owner, name)
+            if data[alias] is None:
+                errors.append({"type": "NOT_FOUND", "path": [alias]})
+        StubHandler.requests_served += 1
+
+        body = json.dumps({"data": data, **({"errors": errors} if errors else {})})
+        encoded = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start(port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check() -> int:
+    server = start()
+    graphql_fetcher.GRAPHQL_URL = f"http://127.0.0.1:{server.server_address[1]}/graphql"
+    repos = [
+        RepoInfo(f"owner{i}", f"missing{i}" if i % 11 == 0 else f"repo{i}", 0, "", "")
+        for i in range(100)
+    ]
+
+    mismatches = 0
+    fetched = 0
+    for start_index in range(0, len(repos), graphql_fetcher.DEFAULT_BATCH_SIZE):
+        batch = repos[start_index : start_index + graphql_fetcher.DEFAULT_BATCH_SIZE]
+        details = fetch_repo_details(batch)
+        fetched += len(details)
+        for repo in batch:
+            node = stub_repository(repo.owner, repo.name)
+            got = details.get(f"{repo.owner}/{repo.name}".lower())
+            if (node is None) != (got is None):
+                mismatches += 1
+            elif got is not None and (
+                sum(got.languages.values())
+                != sum(edge["size"] for edge in node["languages"]["edges"])
+                or got.is_archived != node["isArchived"]
+                or (got.readme is None)
+                == any(node[f"readme{i}"] for i in range(len(README_PATHS)))
+            ):
+                mismatches += 1
+    server.shutdown()
+
+    print(
+        f"{StubHandler.requests_served} GraphQL requests returned details "
+        f"for {fetched}/{len(repos)} repos"
+    )
+    if mismatches:
+        print(f"✗ {mismatches} repos differ from the stub data")
+        return 1
+    print("✓ Batched details match the stub data")
+    return 0
+
+
+def main() -> int:
+    if "--check" in sys.argv[1:]:
+        return check()
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"GraphQL stub listening on http://127.0.0.1:{port}/graphql")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
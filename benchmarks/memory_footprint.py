@@ -0,0 +1,170 @@
+"""
+Peak RSS of holding a million synthetic results and their "already collected" set
+
+Scenarios (each runs in its own process, so peaks do not mix):
+    before      the original dict-backed dataclasses and a set of repo name strings
+    after       slotted records with interned language and source, and a HashedNameSet
+    after-bloom slotted records and a BloomNameSet sized for the run
+
+Records are decoded from JSON lines, as when they come from the search API or the
+results store, so every field starts out as its own string object.
+
+Usage: python -m benchmarks.memory_footprint [--results N] [--scenario NAME]
+"""
+
+import json
+import resource
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from src.models import CoverageResult, RepoInfo
+from src.seen_set import BloomNameSet, HashedNameSet
+
+DEFAULT_RESULTS = 1_000_000
+
+LANGUAGES = ["Python", "Go", "TypeScript", "Rust", "Java", "Ruby", "C++", "Unknown"]
+SOURCES = ["README", "Coveralls API", "Codecov API", "Coveralls.io", None]
+
+
+# The models as they were before slots and interning
+@dataclass
+class LegacyRepoInfo:
+    owner: str
+    name: str
+    stars: int
+    language: str
+    clone_url: str
+
+
+@dataclass
+class LegacyCoverageResult:
+    repo: LegacyRepoInfo
+    url: str
+    coverage_percentage: Optional[float]
+    total_lines: Optional[int]
+    source: Optional[str]
+    error: Optional[str]
+    timestamp: str
+
+
+def synthetic_record(i: int) -> dict[str, Any]:
+    source = SOURCES[i % len(SOURCES)]
+    return json.loads(
+        json.dumps(
+            {
+                "repo": f"owner{i // 7}/repo{i}",
+                "stars": 1_000_000 - i,
+                "language": LANGUAGES[i % len(LANGUAGES)],
+                "coverage": None if source is None else (i % 1000) / 10,
+                "total_lines": i * 13 % 500_000,
+                "source": source,
+                "error": "No coverage data found" if source is None else None,
+                "timestamp": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}",
+            }
+        )
+    )
+
+
+def build(results: int, repo_cls: Callable, result_cls: Callable, seen: Any) -> list:
+    held = []
+    for i in range(results):
+        record = synthetic_record(i)
+        owner, name = record["repo"].split("/")
+        repo = repo_cls(
+            owner,
+            name,
+            record["stars"],
+            record["language"],
+            f"https://github.com/{record['repo']}.git",
+        )
+        held.append(
+            result_cls(
+                repo,
+                f"https://github.com/{record['repo']}",
+                record["coverage"],
+                record["total_lines"],
+                record["source"],
+                record["error"],
+                record["timestamp"],
+            )
+        )
+        seen.add(record["repo"])
+    return held
+
+
+# name: (repo class, result class, seen-set factory taking the number of results)
+SCENARIOS: dict[str, tuple[Callable, Callable, Callable[[int], Any]]] = {
+    "before": (LegacyRepoInfo, LegacyCoverageResult, lambda n: set()),
+    "after": (RepoInfo, CoverageResult, lambda n: HashedNameSet()),
+    "after-bloom": (RepoInfo, CoverageResult, BloomNameSet),
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_scenario(name: str, results: int) -> None:
+    repo_cls, result_cls, make_seen = SCENARIOS[name]
+    baseline = peak_rss_mb()
+    seen = make_seen(results)
+    held = build(results, repo_cls, result_cls, seen)
+    last = held[-1].repo
+    print(
+        json.dumps(
+            {
+                "peak_mb": peak_rss_mb() - baseline,
+                "found": f"{last.owner}/{last.name}" in seen,
+            }
+        )
+    )
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    results = DEFAULT_RESULTS
+    if "--results" in args:
+        results = int(args[args.index("--results") + 1])
+    if "--scenario" in args:
+        run_scenario(args[args.index("--scenario") + 1], results)
+        return 0
+
+    peaks = {}
+    for name in SCENARIOS:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.memory_footprint",
+                "--scenario",
+                name,
+                "--results",
+                str(results),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        measured = json.loads(output)
+        peaks[name] = measured["peak_mb"]
+        print(
+            f"{name:12} {measured['peak_mb']:8.1f} MB peak RSS for {results:,} results "
+            f"({measured['peak_mb'] * 1024 * 1024 / results:.0f} bytes each)"
+        )
+        if not measured["found"]:
+            print(f"✗ {name}: the last repo is missing from the seen-set")
+            return 1
+
+    saved = 1 - peaks["after"] / peaks["before"]
+    if saved <= 0:
+        print(f"\n✗ Slotted records use no less memory ({saved:.0%})")
+        return 1
+    print(f"\n✓ Slotted records and hashed seen-set use {saved:.0%} less memory")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Check the compiled README matcher against the original pattern loop and time both
+
+Usage: python -m benchmarks.readme_matcher
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+from src.coverage_matchers import CODECOV_BADGE, PERCENTAGE, iter_readme_candidates
+
+CORPUS_DIR = Path(__file__).parent / "corpus" / "readmes"
+
+# The pattern list extract_coverage_from_readme used before the compiled matcher
+LEGACY_PATTERNS = [
+    r"codecov\.io/.*?(\d+)%",
+    r"codecov\.io/.*?(\d+\.\d+)%",
+    r"img\.shields\.io/codecov/c/github/([^/]+/[^/]+)",
+    r"coveralls\.io/.*?(\d+)%",
+    r"coveralls\.io/.*?(\d+\.\d+)%",
+    r"img\.shields\.io/.*?coverage[/-](\d+)%",
+    r"img\.shields\.io/.*?coverage[/-](\d+\.\d+)%",
+    r"coverage:?\s*(\d+)%",
+    r"coverage:?\s*(\d+\.\d+)%",
+    r"test coverage:?\s*(\d+)%",
+    r"test coverage:?\s*(\d+\.\d+)%",
+    r"code coverage:?\s*(\d+)%",
+    r"code coverage:?\s*(\d+\.\d+)%",
+]
+LEGACY_BADGE_PATTERN = r"img\.shields\.io/codecov/c/github/([^/]+/[^/]+)"
+
+
+def legacy_candidates(content: str) -> Iterator[tuple[str, str]]:
+    """Candidates in the order the original findall loop examined them"""
+    for pattern in LEGACY_PATTERNS:
+        matches = re.findall(pattern, content)
+        if not matches:
+            continue
+        if pattern == LEGACY_BADGE_PATTERN:
+            for match in matches:
+                yield CODECOV_BADGE, match
+        else:
+            yield PERCENTAGE, matches[0]
+
+
+def resolve(candidates: Iterator[tuple[str, str]]) -> float | None:
+    """Pick the coverage the extractor would report, with badge lookups stubbed"""
+    for kind, value in candidates:
+        if kind == CODECOV_BADGE:
+            # Deterministic stand-in for the shields.io lookup
+            if len(value) % 2 == 0:
+                return float(len(value))
+        else:
+            coverage = float(value)
+            if 0 <= coverage <= 100:
+                return coverage
+    return None
+
+
+def best_time(fn, content: str, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        resolve(fn(content))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    readmes = {
+        path.name: path.read_text(encoding="utf-8").lower()
+        for path in sorted(CORPUS_DIR.glob("*.md"))
+    }
+
+    mismatches = 0
+    for name, content in readmes.items():
+        expected = list(legacy_candidates(content))
+        actual = list(iter_readme_candidates(content))
+        status = "ok" if expected == actual else "MISMATCH"
+        if expected != actual:
+            mismatches += 1
+        print(f"{status:8} {name}: {resolve(iter(actual))}")
+
+    # A multi-MB awesome-style document: every corpus README repeated, no early match
+    no_badges = [c for c in readmes.values() if resolve(legacy_candidates(c)) is None]
+    large = "\n".join(no_badges) * max(
+        1, 4_000_000 // max(1, len("\n".join(no_badges)))
+    )
+    if list(legacy_candidates(large)) != list(iter_readme_candidates(large)):
+        mismatches += 1
+        print(f"MISMATCH large README ({len(large):,} chars)")
+
+    legacy_time = best_time(legacy_candidates, large, rounds=3)
+    compiled_time = best_time(iter_readme_candidates, large, rounds=3)
+    print(
+        f"\n{len(large) / 1_000_000:.1f} MB README: legacy {legacy_time * 1000:.1f} ms, "
+        f"compiled {compiled_time * 1000:.1f} ms ({legacy_time / compiled_time:.1f}x)"
+    )
+
+    if mismatches:
+        print(f"\n✗ {mismatches} corpus entries differ from the legacy matcher")
+        return 1
+    print(f"\n✓ {len(readmes)} corpus READMEs match the legacy matcher")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Local server replaying recorded GitHub, Coveralls and shields.io responses
+
+Requests arrive as /<host>/<path>?<query> (see src.http_replay.replay_url) and are
+answered from a fixture directory, with optional injected latency and 503 errors.
+Whole hosts can be taken down: "error" answers every request with 503, "hang" holds
+each request for `hang_seconds` before answering. With `chunk_bytes`, bodies are sent
+with chunked transfer-encoding in pieces of that size instead of with Content-Length.
+
+Usage: python -m benchmarks.replay_server FIXTURE_DIR [--port N] [--latency MS] [--error-rate P]
+        [--fault HOST=error|hang]
+    then run main.py with HTTP_REPLAY_URL=http://127.0.0.1:N
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+from src.http_replay import load_fixture, original_url
+
+
+@dataclass
+class ReplayStats:
+    served: int = 0
+    missing: int = 0
+    injected_errors: int = 0
+    faulted: int = 0
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixture_dir: str,
+        port: int = 0,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        faults: Optional[dict[str, str]] = None,
+        hang_seconds: float = 30.0,
+        chunk_bytes: int = 0,
+    ):
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.fixture_dir = fixture_dir
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.faults = faults or {}
+        self.hang_seconds = hang_seconds
+        self.chunk_bytes = chunk_bytes
+        self.stats = ReplayStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def draw(self) -> tuple[float, bool]:
+        """Delay in seconds and whether to fail, for one request"""
+        with self._lock:
+            # Exponential jitter around the mean keeps a realistic long tail
+            delay = (
+                self._random.expovariate(1 / self.latency_ms) / 1000
+                if self.latency_ms > 0
+                else 0.0
+            )
+            return delay, self._random.random() < self.error_rate
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading a streamed body early drop the connection
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self) -> "ReplayServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def _reply(self, status: int, headers: dict[str, str], body: str) -> None:
+        encoded = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        chunk_bytes = self.server.chunk_bytes
+        if not chunk_bytes:
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(encoded), chunk_bytes):
+            chunk = encoded[start : start + chunk_bytes]
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = original_url(self.path)
+        fault = self.server.faults.get(urlparse(url).hostname or "")
+        if fault is not None:
+            self.server.count("faulted")
+            if fault == "hang":
+                time.sleep(self.server.hang_seconds)
+            self._reply(503, {}, f"{fault} injected for this host")
+            return
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.server.count("injected_errors")
+            self._reply(503, {}, "injected error")
+            return
+        fixture = load_fixture(self.server.fixture_dir, url)
+        if fixture is None:
+            self.server.count("missing")
+            self._reply(
+                404, {"Content-Type": "application/json"}, '{"message": "Not Found"}'
+            )
+            return
+        self.server.count("served")
+        self._reply(fixture.status, fixture.headers, fixture.body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        # GraphQL bodies are not recorded; answering 404 sends clients back to REST
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.count("missing")
+        self._reply(
+            404,
+            {"Content-Type": "application/json"},
+            json.dumps({"message": "Not Found"}),
+        )
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        return 1
+    faults = {}
+    while "--fault" in args:
+        index = args.index("--fault")
+        host, _, fault = args[index + 1].partition("=")
+        faults[host] = fault or "error"
+        del args[index : index + 2]
+    options = {"--port": "8766", "--latency": "0", "--error-rate": "0"}
+    for name in options:
+        if name in args:
+            index = args.index(name)
+            options[name] = args[index + 1]
+            del args[index : index + 2]
+    server = ReplayServer(
+        args[0],
+        port=int(options["--port"]),
+        latency_ms=float(options["--latency"]),
+        error_rate=float(options["--error-rate"]),
+        faults=faults,
+    )
+    print(f"Replaying {args[0]} on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
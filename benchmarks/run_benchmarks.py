@@ -0,0 +1,233 @@
+"""
+Offline benchmark suite: end-to-end repos/second through main() against the replay
+server, plus microbenchmarks of the README and Coveralls extractors
+
+Usage:
+    python -m benchmarks.run_benchmarks [--repos N] [--workers N] [--latency MS]
+        [--error-rate P] [--fixtures DIR] [--output FILE]
+    python -m benchmarks.run_benchmarks --compare BASELINE.json CURRENT.json [--threshold PCT]
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.coveralls_matcher import large_page
+from benchmarks.fixtures import build_fixtures
+from benchmarks.replay_server import ReplayServer
+from src.coverage_matchers import find_coveralls_coverage, iter_readme_candidates
+from src.http_client import enable_replay, get_http_stats
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+
+def take_option(args: list[str], name: str, default: str) -> str:
+    if name not in args:
+        return default
+    index = args.index(name)
+    value = args[index + 1]
+    del args[index : index + 2]
+    return value
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_main(replay_base: str, repos: int, workers: int) -> dict[str, Any]:
+    """Run main() over `repos` replayed repos in a scratch directory and time it"""
+    import main as entry_point  # pylint: disable=import-outside-toplevel
+
+    enable_replay(replay_base)
+    requests_before = get_http_stats().requests
+    previous_dir = os.getcwd()
+    previous_argv = sys.argv
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        sys.argv = [
+            "main.py",
+            "--count",
+            str(repos),
+            "--workers",
+            str(workers),
+            "--no-cache",
+            "--deterministic",
+        ]
+        try:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                entry_point.main()
+            seconds = time.perf_counter() - start
+            with open("coverage_results.jsonl", "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        finally:
+            os.chdir(previous_dir)
+            sys.argv = previous_argv
+            enable_replay(None)
+
+    return {
+        "seconds": round(seconds, 3),
+        "repos": len(records),
+        "repos_per_second": round(len(records) / seconds, 2),
+        "requests": get_http_stats().requests - requests_before,
+        "with_coverage": sum(1 for r in records if r["coverage"] is not None),
+    }
+
+
+def best_ms(fn: Callable[[], Any], rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def microbenchmarks() -> dict[str, float]:
+    """Best-of-5 milliseconds for each extractor workload"""
+    readmes = [
+        p.read_text(encoding="utf-8").lower()
+        for p in sorted((CORPUS_DIR / "readmes").glob("*.md"))
+    ]
+    pages = [
+        p.read_text(encoding="utf-8")
+        for p in sorted((CORPUS_DIR / "coveralls").glob("*.html"))
+    ]
+    # Awesome-list sized README (~4 MB) with no coverage badge to stop early
+    large_readme = readmes[0] * max(1, 4_000_000 // len(readmes[0]))
+    coveralls_2000 = large_page(2000)
+
+    return {
+        "readme_corpus_ms": best_ms(
+            lambda: [list(iter_readme_candidates(c)) for c in readmes]
+        ),
+        "readme_large_ms": best_ms(lambda: list(iter_readme_candidates(large_readme))),
+        "coveralls_corpus_ms": best_ms(
+            lambda: [find_coveralls_coverage(p) for p in pages]
+        ),
+        "coveralls_2000_rows_ms": best_ms(
+            lambda: find_coveralls_coverage(coveralls_2000)
+        ),
+    }
+
+
+def flatten(results: dict[str, Any]) -> dict[str, tuple[float, bool]]:
+    """metric name -> (value, higher is better)"""
+    flat = {}
+    for scenario, values in results.get("end_to_end", {}).items():
+        flat[f"{scenario} repos/s"] = (values["repos_per_second"], True)
+    for name, value in results.get("micro", {}).items():
+        flat[name] = (value, False)
+    return flat
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = flatten(json.load(f))
+    with open(current_path, "r", encoding="utf-8") as f:
+        current = flatten(json.load(f))
+
+    regressions = 0
+    print(f"{'Metric':<28} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for name, (value, higher_is_better) in current.items():
+        if name not in baseline or not baseline[name][0]:
+            print(f"{name:<28} {'-':>10} {value:>10} {'new':>8}")
+            continue
+        old = baseline[name][0]
+        change = (value - old) / old * 100
+        worse = -change if higher_is_better else change
+        marker = " ✗" if worse > threshold else ""
+        regressions += bool(marker)
+        print(f"{name:<28} {old:>10} {value:>10} {change:>+7.1f}%{marker}")
+
+    if regressions:
+        print(f"\n✗ {regressions} metrics regressed by more than {threshold:g}%")
+        return 1
+    print(f"\n✓ No metric regressed by more than {threshold:g}%")
+    return 0
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if "--compare" in args:
+        threshold = float(take_option(args, "--threshold", "10"))
+        index = args.index("--compare")
+        return compare(args[index + 1], args[index + 2], threshold)
+
+    repos = int(take_option(args, "--repos", "200"))
+    workers = int(take_option(args, "--workers", "8"))
+    latency_ms = float(take_option(args, "--latency", "20"))
+    error_rate = float(take_option(args, "--error-rate", "0"))
+    fixture_dir = take_option(args, "--fixtures", "")
+    output = take_option(args, "--output", DEFAULT_OUTPUT)
+
+    results: dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "repos": repos,
+            "workers": workers,
+            "latency_ms": latency_ms,
+            "error_rate": error_rate,
+            "fixtures": fixture_dir or "synthetic",
+        },
+        "end_to_end": {},
+    }
+
+    with tempfile.TemporaryDirectory() as generated:
+        if not fixture_dir:
+            fixture_dir = generated
+            build_fixtures(fixture_dir, repos)
+        for scenario_workers in sorted({1, workers}):
+            server = ReplayServer(
+                fixture_dir, latency_ms=latency_ms, error_rate=error_rate
+            ).start()
+            try:
+                outcome = run_main(server.base_url, repos, scenario_workers)
+            finally:
+                server.shutdown()
+                server.server_close()
+            outcome["injected_errors"] = server.stats.injected_errors
+            outcome["missing_fixtures"] = server.stats.missing
+            results["end_to_end"][f"workers={scenario_workers}"] = outcome
+            print(
+                f"workers={scenario_workers}: {outcome['repos']} repos in "
+                f"{outcome['seconds']:.2f}s ({outcome['repos_per_second']} repos/s, "
+                f"{outcome['requests']} requests)"
+            )
+
+    results["micro"] = microbenchmarks()
+    for name, value in results["micro"].items():
+        print(f"{name}: {value} ms")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
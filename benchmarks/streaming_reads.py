@@ -0,0 +1,148 @@
+"""
+Check that streamed, early-stopping README and Coveralls reads give the same figures as
+reading whole bodies, and measure how much of each body they download
+
+Every corpus document is served as is and followed by ~2 MB of filler text (a multi-MB
+README or page whose figure sits near the top), once with Content-Length and once with
+chunked transfer-encoding in small pieces. A read must stop within one check interval
+of the point where the text settles the figure.
+
+Usage: python -m benchmarks.streaming_reads
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks.readme_matcher import resolve
+from benchmarks.replay_server import ReplayServer
+from src.coverage_matchers import (
+    coveralls_coverage_settled,
+    find_coveralls_coverage,
+    iter_readme_candidates,
+    readme_coverage_settled,
+)
+from src.http_client import (
+    STREAM_CHUNK_BYTES,
+    enable_replay,
+    http_get,
+    http_get_text,
+)
+from src.http_replay import Fixture, save_fixture
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+FILLER_LINE = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod.\n"
+)
+FILLER = FILLER_LINE * (2_000_000 // len(FILLER_LINE))
+# Large enough that the full reads used as the reference are never cut off
+UNLIMITED = 1 << 30
+
+# Server piece size for each transfer mode (0 sends Content-Length)
+TRANSFERS = {"content-length": 0, "chunked": 8 * 1024}
+
+
+def readme_coverage(text: str) -> Optional[float]:
+    return resolve(iter_readme_candidates(text.lower()))
+
+
+KINDS: dict[
+    str, tuple[str, Callable[[str], Optional[float]], Callable[[str], bool]]
+] = {
+    "readmes": (
+        "*.md",
+        readme_coverage,
+        lambda text: readme_coverage_settled(text.lower()),
+    ),
+    "coveralls": ("*.html", find_coveralls_coverage, coveralls_coverage_settled),
+}
+
+
+def read_all(
+    documents: list[tuple[str, str, str]], transfer: str
+) -> tuple[int, int, int]:
+    """Stream every document; (mismatches, characters in full, characters read)"""
+    mismatches = 0
+    total_chars = read_chars = 0
+    for kind, name, url in documents:
+        _, parse, settled = KINDS[kind]
+        full = http_get_text(url, max_bytes=UNLIMITED).text
+        streamed = http_get_text(url, done=settled)
+        expected, actual = parse(full), parse(streamed.text)
+        total_chars += len(full)
+        read_chars += len(streamed.text)
+        # Checks run every STREAM_CHUNK_BYTES, so one interval before the stop (plus a
+        # piece) the text must not have settled yet
+        overread = not streamed.complete and settled(
+            full[: max(0, len(streamed.text) - 2 * STREAM_CHUNK_BYTES)]
+        )
+        status = "ok"
+        if expected != actual:
+            status = "MISMATCH"
+        elif overread:
+            status = "OVERREAD"
+        if status != "ok":
+            mismatches += 1
+        print(
+            f"{status:8} {transfer} {kind}/{name}: {actual} "
+            f"({len(streamed.text):,} of {len(full):,} chars read)"
+        )
+    return mismatches, total_chars, read_chars
+
+
+def main() -> int:
+    mismatches = 0
+    total_chars = read_chars = 0
+    with tempfile.TemporaryDirectory() as fixtures:
+        documents = []
+        for kind, (pattern, _, _) in KINDS.items():
+            for path in sorted((CORPUS_DIR / kind).glob(pattern)):
+                text = path.read_text(encoding="utf-8")
+                for variant, body in (("", text), (" + filler", text + "\n" + FILLER)):
+                    url = f"https://example.com/{kind}/{path.name}{len(documents)}"
+                    save_fixture(
+                        fixtures,
+                        Fixture(url, 200, {"Content-Type": "text/plain"}, body),
+                    )
+                    documents.append((kind, f"{path.name}{variant}", url))
+
+        for transfer, chunk_bytes in TRANSFERS.items():
+            server = ReplayServer(fixtures, chunk_bytes=chunk_bytes).start()
+            enable_replay(server.base_url)
+            try:
+                missed, total, read = read_all(documents, transfer)
+                mismatches += missed
+                total_chars += total
+                read_chars += read
+                # The unstreamed path must agree with the reference reads
+                for kind, name, url in documents[:2]:
+                    full = http_get_text(url, max_bytes=UNLIMITED).text
+                    if http_get(url).text != full:
+                        mismatches += 1
+                        print(
+                            f"MISMATCH {transfer} {kind}/{name}: "
+                            "full read differs from http_get"
+                        )
+            finally:
+                enable_replay(None)
+                server.shutdown()
+                server.server_close()
+
+    print(
+        f"\nRead {read_chars / 1_000_000:.1f} MB of {total_chars / 1_000_000:.1f} MB "
+        f"({read_chars / total_chars:.0%})"
+    )
+    if mismatches:
+        print(f"✗ {mismatches} documents differ from reading the whole body")
+        return 1
+    print(
+        f"✓ {len(documents)} documents over {len(TRANSFERS)} transfer modes: streamed "
+        "reads match reading the whole body and stop once the figure is settled"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
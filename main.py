@@ -3,36 +3,253 @@
 Coverage Collector - Main entry point
 """
 
-import json
 import sys
 import os
+from glob import glob
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 from dotenv import load_dotenv
-from src.get_top_repos import get_top_repos
-from src.extract_coverage import extract_coverage_smart
+from src.concurrency import prefetch, process_in_order, set_host_limit
+from src.get_top_repos import iter_top_repos
+from src.graphql_fetcher import prefetch_repo_details
+from src.extract_coverage import (
+    DEFAULT_RACE_DEADLINE,
+    extract_coverage_smart,
+    set_race_workers,
+    sources_tried,
+)
+from src.http_cache import HttpCache
+from src.http_client import (
+    enable_cache,
+    enable_recording,
+    get_cache_stats,
+    get_host_health_stats,
+    get_http_stats,
+    get_rate_limit_stats,
+    set_max_body_size,
+)
+from src.leases import (
+    DEFAULT_LEASE_DIR,
+    DEFAULT_LEASE_TTL,
+    LeaseDir,
+    default_worker_id,
+    in_shard,
+    parse_shard,
+)
+from src.line_counter import ExactLineCounter, enable_exact_line_count
+from src.metrics import (
+    enable_cpu_profile,
+    print_stage_summary,
+    stage,
+    write_cpu_profile,
+    write_profile,
+)
 from src.models import CoverageResult, RepoInfo
+from src.refresh import RefreshState, iter_changed_repos, mark_refreshed
+from src.repo_filter import NegativeCache, get_filter_stats
+from src.results_db import DEFAULT_DB_FILE, SqliteResultStore
+from src.results_store import (
+    LEGACY_RESULTS_FILE,
+    RESULTS_FILE,
+    WORKER_RESULTS_PATTERN,
+    JsonlResultStore,
+    ResultStore,
+    merge_records,
+    read_records,
+    result_to_record,
+    worker_results_file,
+    write_legacy_json,
+)
+from src.server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_RESULT_TTL,
+    CoverageService,
+    make_server,
+)
+from src.seen_set import BloomNameSet, HashedNameSet, NameSet
+from src.source_stats import SourceStats, enable_adaptive_order
+from src.sharded_crawl import DEFAULT_CURSOR_FILE, ShardedCrawler
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def load_existing_coverage() -> set[str]:
-    """Load existing coverage data and return set of repo names that already have coverage"""
-    coverage_file = "coverage_results.json"
-    if not os.path.exists(coverage_file):
-        return set()
+def open_results_store(db_path: Optional[str] = None) -> ResultStore:
+    """Open the results store, migrating a legacy coverage_results.json on first use"""
+    if db_path:
+        return SqliteResultStore(db_path)
 
+    store = JsonlResultStore(RESULTS_FILE)
+    if not os.path.exists(RESULTS_FILE) and os.path.exists(LEGACY_RESULTS_FILE):
+        try:
+            migrated = store.import_legacy(LEGACY_RESULTS_FILE)
+            print(
+                f"📦 Migrated {migrated} results from {LEGACY_RESULTS_FILE} to {RESULTS_FILE}"
+            )
+        except (ValueError, IOError) as e:
+            print(f"⚠️  Could not migrate {LEGACY_RESULTS_FILE}: {e}")
+    return store
+
+
+def load_existing_coverage(store: ResultStore, seen: NameSet) -> None:
+    """Stream the results store, adding every repo name that already has coverage to seen"""
+    seen.update(store.iter_repo_names())
+
+
+def take_option(args: list[str], name: str) -> Optional[str]:
+    """Remove `name VALUE` from args and return VALUE (None if the option is absent)"""
+    if name not in args:
+        return None
+    index = args.index(name)
+    if index + 1 >= len(args):
+        print(f"Error: {name} requires a value")
+        sys.exit(1)
+    value = args[index + 1]
+    del args[index : index + 2]
+    return value
+
+
+def export_results(args: list[str]) -> None:
+    """Write the results store out in the legacy JSON array format"""
+    db_path = take_option(args, "--db")
+    output = args[0] if args else LEGACY_RESULTS_FILE
+    count = write_legacy_json(open_results_store(db_path).iter_records(), output)
+    print(f"Exported {count} results from {db_path or RESULTS_FILE} to {output}")
+
+
+def import_results(args: list[str]) -> None:
+    """Copy results from a JSON array or JSON Lines file into the SQLite backend"""
+    db_path = take_option(args, "--db") or DEFAULT_DB_FILE
+    source = args[0] if args else LEGACY_RESULTS_FILE
+    if not os.path.exists(source):
+        print(f"Error: {source} not found")
+        sys.exit(1)
+    added = SqliteResultStore(db_path).import_records(read_records(source))
+    print(f"Imported {added} new results from {source} into {db_path}")
+
+
+def report_results(args: list[str]) -> None:
+    """Print per-language coverage statistics computed inside the SQLite backend"""
+    db_path = take_option(args, "--db") or DEFAULT_DB_FILE
+    min_stars = take_option(args, "--min-stars")
+    since = take_option(args, "--since")
+    if args:
+        print(f"Error: Unknown argument '{args[0]}'")
+        sys.exit(1)
+    if not os.path.exists(db_path):
+        print(f"Error: {db_path} not found (run 'python main.py import-json' first)")
+        sys.exit(1)
     try:
-        with open(coverage_file, "r", encoding="utf-8") as f:
-            existing_results = json.load(f)
-            return {result["repo"] for result in existing_results}
-    except (json.JSONDecodeError, KeyError, IOError):
-        return set()
+        rows = SqliteResultStore(db_path).report(
+            min_stars=int(min_stars or 0), since=since
+        )
+    except ValueError:
+        print(f"Error: '{min_stars}' is not a valid number for --min-stars")
+        sys.exit(1)
+
+    if not rows:
+        print("No coverage data matches the given filters")
+        return
+    print(
+        f"{'Language':<14} {'Repos':>6} {'Mean':>7} {'P25':>7} {'Median':>7} {'P90':>7}"
+    )
+    for row in rows:
+        print(
+            f"{row.language or 'Unknown':<14} {row.repos:>6} {row.mean:>6.1f}% "
+            f"{row.p25:>6.1f}% {row.median:>6.1f}% {row.p90:>6.1f}%"
+        )
+
+
+def merge_results(args: list[str]) -> None:
+    """Deduplicate the per-worker files of a multi-node run into the canonical results"""
+    db_path = take_option(args, "--db")
+    sources = args or sorted(glob(WORKER_RESULTS_PATTERN))
+    missing = [source for source in sources if not os.path.exists(source)]
+    if missing:
+        print(f"Error: {missing[0]} not found")
+        sys.exit(1)
+    if not sources:
+        print(f"No worker result files matching {WORKER_RESULTS_PATTERN}")
+        return
+    added = merge_records(
+        open_results_store(db_path), (read_records(source) for source in sources)
+    )
+    print(
+        f"Merged {added} new results from {len(sources)} worker files "
+        f"into {db_path or RESULTS_FILE}"
+    )
+
+
+def serve(args: list[str]) -> None:
+    """Answer coverage lookups over HTTP, keeping connections and results warm"""
+    host = take_option(args, "--host") or DEFAULT_HOST
+    port = take_option(args, "--port")
+    ttl = take_option(args, "--ttl")
+    race = "--race" in args
+    if race:
+        args.remove("--race")
+    if args:
+        print(f"Error: Unknown argument '{args[0]}'")
+        sys.exit(1)
+    try:
+        service = CoverageService(
+            ttl=float(ttl) if ttl else DEFAULT_RESULT_TTL, race=race
+        )
+        server = make_server(service, host, int(port) if port else DEFAULT_PORT)
+    except ValueError:
+        print("Error: --port and --ttl must be numbers")
+        sys.exit(1)
+
+    # Responses are cached on disk as well, so a restart starts warm
+    enable_cache(HttpCache())
+    print(f"🛰️  Serving coverage lookups on http://{host}:{server.server_port}")
+    print("   GET /coverage/{owner}/{name}, POST /coverage/batch, GET /health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+
+
+COMMANDS = {
+    "export": export_results,
+    "import-json": import_results,
+    "merge": merge_results,
+    "report": report_results,
+    "serve": serve,
+}
 
 
 def main():
     """Main entry point"""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     # Parse command line arguments
     num_repos = 5  # Default
+    workers = 1
+    db_path: Optional[str] = None
+    sharded = False
+    refresh = False
+    use_graphql = False
+    race = False
+    profile_path: Optional[str] = None
+    cpu_profile_path: Optional[str] = None
+    deadline = DEFAULT_RACE_DEADLINE
+    cursor_path: Optional[str] = None
+    shard: Optional[tuple[int, int]] = None
+    lease_dir: Optional[str] = None
+    lease_ttl = DEFAULT_LEASE_TTL
+    worker_id: Optional[str] = None
+    line_counter: Optional[ExactLineCounter] = None
+    deterministic = False
+    bloom_capacity: Optional[int] = None
+
+    # Responses are cached on disk and revalidated with ETag / Last-Modified
+    enable_cache(HttpCache())
 
     i = 1
     while i < len(sys.argv):
@@ -54,7 +271,7 @@ def main():
                 clone_url=f"https://github.com/{repo_name}.git",
             )
             print(f"Testing single repo: {repo_name}")
-            result = extract_coverage_smart(test_repo)
+            result = extract_coverage_smart(test_repo, race=race, deadline=deadline)
             if result.coverage_percentage is not None:
                 print(f"✓ Success! Coverage: {result.coverage_percentage:.1f}%")
             else:
@@ -70,6 +287,163 @@ def main():
             except ValueError:
                 print(f"Error: '{sys.argv[i + 1]}' is not a valid number for --count")
                 sys.exit(1)
+        elif arg == "--workers":
+            if i + 1 >= len(sys.argv):
+                print("Error: --workers requires a number")
+                sys.exit(1)
+            try:
+                workers = int(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(f"Error: '{sys.argv[i + 1]}' is not a valid number for --workers")
+                sys.exit(1)
+            if workers < 1:
+                print("Error: --workers must be at least 1")
+                sys.exit(1)
+        elif arg == "--host-limit":
+            if i + 1 >= len(sys.argv) or "=" not in sys.argv[i + 1]:
+                print("Error: --host-limit requires HOST=N (e.g. coveralls.io=2)")
+                sys.exit(1)
+            host, _, limit = sys.argv[i + 1].partition("=")
+            try:
+                set_host_limit(host, int(limit))
+                i += 1
+            except ValueError:
+                print(f"Error: '{sys.argv[i + 1]}' is not a valid host limit")
+                sys.exit(1)
+        elif arg == "--max-body-kb":
+            if i + 1 >= len(sys.argv):
+                print("Error: --max-body-kb requires a number")
+                sys.exit(1)
+            try:
+                max_body_kb = int(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(
+                    f"Error: '{sys.argv[i + 1]}' is not a valid number for --max-body-kb"
+                )
+                sys.exit(1)
+            if max_body_kb < 1:
+                print("Error: --max-body-kb must be at least 1")
+                sys.exit(1)
+            # READMEs and Coveralls pages are cut off after this many KiB
+            set_max_body_size(max_body_kb * 1024)
+        elif arg == "--db":
+            if i + 1 >= len(sys.argv):
+                print("Error: --db requires a database path")
+                sys.exit(1)
+            db_path = sys.argv[i + 1]
+            i += 1
+        elif arg == "--refresh":
+            refresh = True
+        elif arg == "--sharded":
+            sharded = True
+        elif arg == "--crawl-cursor":
+            if i + 1 >= len(sys.argv):
+                print("Error: --crawl-cursor requires a file path")
+                sys.exit(1)
+            cursor_path = sys.argv[i + 1]
+            sharded = True
+            i += 1
+        elif arg == "--shard":
+            if i + 1 >= len(sys.argv):
+                print("Error: --shard requires i/N (e.g. 2/4)")
+                sys.exit(1)
+            try:
+                shard = parse_shard(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(f"Error: '{sys.argv[i + 1]}' is not a valid shard (use i/N)")
+                sys.exit(1)
+        elif arg == "--lease-dir":
+            if i + 1 >= len(sys.argv):
+                print("Error: --lease-dir requires a directory")
+                sys.exit(1)
+            lease_dir = sys.argv[i + 1]
+            i += 1
+        elif arg == "--lease-ttl":
+            if i + 1 >= len(sys.argv):
+                print("Error: --lease-ttl requires a number of seconds")
+                sys.exit(1)
+            try:
+                lease_ttl = float(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(
+                    f"Error: '{sys.argv[i + 1]}' is not a valid number for --lease-ttl"
+                )
+                sys.exit(1)
+        elif arg == "--worker-id":
+            if i + 1 >= len(sys.argv):
+                print("Error: --worker-id requires a name")
+                sys.exit(1)
+            worker_id = sys.argv[i + 1]
+            i += 1
+        elif arg == "--race":
+            race = True
+        elif arg == "--deadline":
+            if i + 1 >= len(sys.argv):
+                print("Error: --deadline requires a number of seconds")
+                sys.exit(1)
+            try:
+                deadline = float(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(
+                    f"Error: '{sys.argv[i + 1]}' is not a valid number for --deadline"
+                )
+                sys.exit(1)
+            race = True
+        elif arg == "--exact-loc":
+            # Count lines in each repo's tarball instead of estimating from language bytes
+            if line_counter is None:
+                line_counter = ExactLineCounter()
+                enable_exact_line_count(line_counter)
+        elif arg == "--deterministic":
+            # Fixed source order, for runs that must be reproducible
+            deterministic = True
+        elif arg == "--graphql":
+            use_graphql = True
+        elif arg == "--record-fixtures":
+            if i + 1 >= len(sys.argv):
+                print("Error: --record-fixtures requires a directory")
+                sys.exit(1)
+            # Live responses are saved for benchmarks/replay_server.py
+            enable_recording(sys.argv[i + 1])
+            i += 1
+        elif arg == "--profile":
+            if i + 1 >= len(sys.argv):
+                print("Error: --profile requires a file path (.json or .prom)")
+                sys.exit(1)
+            profile_path = sys.argv[i + 1]
+            i += 1
+        elif arg == "--cprofile":
+            if i + 1 >= len(sys.argv):
+                print("Error: --cprofile requires a file path")
+                sys.exit(1)
+            cpu_profile_path = sys.argv[i + 1]
+            enable_cpu_profile()
+            i += 1
+        elif arg == "--seen-bloom":
+            if i + 1 >= len(sys.argv):
+                print("Error: --seen-bloom requires an expected number of repos")
+                sys.exit(1)
+            try:
+                bloom_capacity = int(sys.argv[i + 1])
+                i += 1
+            except ValueError:
+                print(
+                    f"Error: '{sys.argv[i + 1]}' is not a valid number for --seen-bloom"
+                )
+                sys.exit(1)
+        elif arg == "--no-cache":
+            enable_cache(None)
+        elif arg == "--cache-dir":
+            if i + 1 >= len(sys.argv):
+                print("Error: --cache-dir requires a directory")
+                sys.exit(1)
+            enable_cache(HttpCache(sys.argv[i + 1]))
+            i += 1
         elif arg.isdigit():
             # Backward compatibility - first number is count
             num_repos = int(arg)
@@ -81,145 +455,238 @@ def main():
     print(f"Coverage Collector - Processing top {num_repos} GitHub repos\n")
 
     # Load existing coverage data
-    existing_coverage = load_existing_coverage()
+    canonical_store = open_results_store(db_path)
+    store = canonical_store
+    results_path = db_path or RESULTS_FILE
+    # Repo names are kept hashed (or in a Bloom filter), not as a set of strings
+    existing_coverage: NameSet = (
+        BloomNameSet(bloom_capacity) if bloom_capacity else HashedNameSet()
+    )
+    load_existing_coverage(canonical_store, existing_coverage)
+
+    # Several workers sharing this directory: each claims repos through lease files
+    # and writes its own results file, combined afterwards with `python main.py merge`
+    leases: Optional[LeaseDir] = None
+    if shard or lease_dir or worker_id:
+        worker_id = worker_id or default_worker_id()
+        leases = LeaseDir(lease_dir or DEFAULT_LEASE_DIR, worker_id, lease_ttl)
+        results_path = worker_results_file(worker_id)
+        store = JsonlResultStore(results_path)
+        load_existing_coverage(store, existing_coverage)
+        shard_text = f"shard {shard[0]}/{shard[1]}, " if shard else ""
+        print(
+            f"🧩 Worker {worker_id} ({shard_text}leases in {leases.directory}), "
+            f"writing to {results_path}"
+        )
+        if cursor_path is None:
+            cursor_root, cursor_ext = os.path.splitext(DEFAULT_CURSOR_FILE)
+            cursor_path = f"{cursor_root}.{worker_id}{cursor_ext}"
     if existing_coverage:
         print(
             f"📋 Found existing coverage data for {len(existing_coverage)} repositories"
         )
 
-    # Calculate starting rank - start from where we left off
-    start_rank = len(existing_coverage) + 1
-
-    # Skip known problematic repos
-    skip_list = [
-        "freeCodeCamp/freeCodeCamp",  # ESLint dependency conflicts
-        "EbookFoundation/free-programming-books",  # Documentation, no tests
-        "public-apis/public-apis",  # API list, no tests
-        "kamranahmedse/developer-roadmap",  # Learning paths, no tests
-        "donnemartin/system-design-primer",  # Educational content
-        "vinta/awesome-python",  # Curated list
-        # Documentation and educational repos (not actual code projects)
-        "Snailclimb/JavaGuide",  # Documentation
-        "521xueweihan/HelloGitHub",  # Curation list
-        "airbnb/javascript",  # Style guide
-        "avelino/awesome-go",  # Awesome list
-        "f/awesome-chatgpt-prompts",  # Prompts collection
-        "yangshun/tech-interview-handbook",  # Interview guide
-        "Chalarangelo/30-seconds-of-code",  # Code snippets
-        "ryanmcdermott/clean-code-javascript",  # Style guide
-        "microsoft/Web-Dev-For-Beginners",  # Educational content
-        "jaywcjlove/awesome-mac",  # Awesome list
-        "GrowingGit/GitHub-Chinese-Top-Charts",  # Statistics/charts
-        "krahets/hello-algo",  # Algorithm tutorials
-        "bregman-arie/devops-exercises",  # Exercises
-        "MisterBooo/LeetCodeAnimation",  # Educational content
-        "doocs/advanced-java",  # Documentation
-        "fighting41love/funNLP",  # Resource collection
-        "josephmisiti/awesome-machine-learning",  # Awesome list
-        "danielmiessler/SecLists",  # Security lists
-    ]
-
-    # Get top repos starting from our position
-    print(
-        f"🔍 Searching GitHub starting from rank {start_rank} for {num_repos} repositories..."
-    )
-    repos = get_top_repos(
-        count=num_repos * 3,
-        skip_repos=skip_list,
-        prefer_code_langs=True,
-        start_rank=start_rank,
-    )
-    print(f"\n📊 Found {len(repos)} code repositories")
-
-    # Filter repos: skip existing coverage data
-    repos_to_process = []
-    skipped_count = 0
-
-    for repo in repos:
-        repo_name = f"{repo.owner}/{repo.name}"
-        if repo_name in existing_coverage:
-            skipped_count += 1
-            print(f"⏭️  Skipping {repo_name} (already has coverage data)")
-        else:
-            repos_to_process.append(repo)
+    # Coverage sources are tried in the order most likely to pay off for each language,
+    # learned from past lookups (seeded from the stored results on first use)
+    source_stats: Optional[SourceStats] = None
+    if not deterministic:
+        source_stats = SourceStats()
+        if source_stats.empty:
+            seeded = source_stats.bootstrap(
+                canonical_store.iter_records(), sources_tried
+            )
+            if seeded:
+                print(f"🧭 Seeded source statistics from {seeded} stored results")
+        enable_adaptive_order(source_stats)
 
-        if len(repos_to_process) >= num_repos:
-            break
+    # Every run records repos without coverage; --refresh re-checks them with exponential
+    # backoff (discovery runs already skip every repo that has a stored result)
+    negative_cache = NegativeCache()
 
-    if skipped_count > 0:
-        print(f"\n🔄 Skipped {skipped_count} repositories with existing coverage data")
+    # Discover repos page by page; extraction starts as soon as the first page arrives
+    # and discovery stops once enough new repos have been handed to the workers
+    crawler: Optional[ShardedCrawler] = None
+    refresh_state: Optional[RefreshState] = None
+    if refresh:
+        # Existing repos instead of new ones: known pushes and the stalest entries first,
+        # with unchanged repos skipped after one cheap (usually 304) request
+        print(f"🔁 Refreshing up to {num_repos} changed repositories...")
+        refresh_state = RefreshState()
+        discovered: Iterable[RepoInfo] = iter_changed_repos(
+            canonical_store.iter_records(),
+            refresh_state,
+            workers,
+            skip=negative_cache.should_skip,
+        )
+    elif sharded:
+        # Star-range shards below the 1000-result cap, resumed from the saved cursor
+        print(f"🔍 Crawling GitHub by star range for {num_repos} repositories...")
+        crawler = ShardedCrawler(
+            prefer_code_langs=True,
+            cursor_path=cursor_path or DEFAULT_CURSOR_FILE,
+        )
+        discovered = crawler
+    else:
+        # Calculate starting rank - start from where we left off. Other workers' results
+        # are not counted here, so a worker walks the ranking from the top and relies
+        # on the leases to skip what the others have done
+        start_rank = 1 if leases else len(existing_coverage) + 1
+        print(
+            f"🔍 Searching GitHub starting from rank {start_rank} for {num_repos} repositories..."
+        )
+        discovered = iter_top_repos(
+            prefer_code_langs=True,
+            start_rank=start_rank,
+        )
+    skipped_count = 0
+    claimed_elsewhere = 0
 
-    # Show which repos we'll analyze
-    target_repos = repos_to_process[:num_repos]
-    print(f"\n🎯 Will analyze these {len(target_repos)} repositories:")
-    for i, repo in enumerate(target_repos, 1):
-        print(f"  {i}. {repo.owner}/{repo.name} ({repo.stars:,} ⭐, {repo.language})")
+    def new_repos() -> Iterator[RepoInfo]:
+        nonlocal skipped_count, claimed_elsewhere
+        for repo in discovered:
+            repo_name = f"{repo.owner}/{repo.name}"
+            if shard and not in_shard(repo_name, shard):
+                continue
+            if refresh_state is None and repo_name in existing_coverage:
+                skipped_count += 1
+                print(f"⏭️  Skipping {repo_name} (already has coverage data)")
+            elif leases and not leases.claim(
+                repo_name,
+                # A changed repo's lease from its last extraction is spent
+                done_before=(
+                    refresh_state.last_checked(repo_name) if refresh_state else None
+                ),
+            ):
+                claimed_elsewhere += 1
+                print(f"🔒 Skipping {repo_name} (claimed by another worker)")
+            else:
+                yield repo
 
-    print("\n🚀 Starting coverage analysis...\n")
+    target_repos: Iterator[RepoInfo] = islice(new_repos(), num_repos)
+    if use_graphql:
+        # README text and language sizes for a whole batch come back in one request
+        target_repos = prefetch_repo_details(target_repos)
+    if race:
+        # Every worker races its repo's lookups at once on the shared pool
+        set_race_workers(workers)
+    if workers > 1:
+        # Discovery runs in its own thread, at most 2 * workers repos ahead
+        target_repos = prefetch(target_repos, maxsize=workers * 2)
+        print(f"\n🚀 Starting coverage analysis with {workers} workers...\n")
+    else:
+        print("\n🚀 Starting coverage analysis...\n")
 
-    # Collect coverage
-    results: list[CoverageResult] = []
-    for i, repo in enumerate(target_repos, 1):
+    def process(item: tuple[int, RepoInfo]) -> CoverageResult:
+        index, repo = item
         print(
-            f"[{i}/{len(target_repos)}] Processing {repo.owner}/{repo.name} ({repo.stars:,} stars, {repo.language})..."
+            f"[{index}/{num_repos}] Processing {repo.owner}/{repo.name} ({repo.stars:,} stars, {repo.language})..."
         )
-        result = extract_coverage_smart(repo)
-        results.append(result)
+        return extract_coverage_smart(repo, race=race, deadline=deadline)
+
+    # Collect coverage (results come back in input order, whatever the worker count)
+    # and save each one the moment it is produced; only running totals are kept
+    added = 0
+    successful = 0
+    coverage_total = 0.0
+    for _, result, output in process_in_order(
+        enumerate(target_repos, 1), process, workers
+    ):
+        print(output, end="")
+        added += 1
+        with stage("store"):
+            store.append(result_to_record(result))
+        negative_cache.record(result)
+        if leases is not None:
+            leases.complete(f"{result.repo.owner}/{result.repo.name}")
+        if crawler is not None:
+            crawler.mark_processed(result.repo)
+        if refresh_state is not None:
+            mark_refreshed(refresh_state, result.repo, result.timestamp)
 
         if result.coverage_percentage is not None:
+            successful += 1
+            coverage_total += result.coverage_percentage
             print(f"  ✓ Coverage: {result.coverage_percentage:.1f}%")
         else:
             print(f"  ✗ Error: {result.error}")
 
-    # Save results (append to existing data)
-    if results:
-        # Load existing results
-        all_results = []
-        if os.path.exists("coverage_results.json"):
-            try:
-                with open("coverage_results.json", "r", encoding="utf-8") as f:
-                    all_results = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                all_results = []
-
-        # Add new results
-        new_results = [
-            {
-                "repo": f"{r.repo.owner}/{r.repo.name}",
-                "url": r.url,
-                "stars": r.repo.stars,
-                "language": r.repo.language,
-                "coverage": r.coverage_percentage,
-                "total_lines": r.total_lines,
-                "source": r.source,
-                "error": r.error,
-                "timestamp": r.timestamp,
-            }
-            for r in results
-        ]
-        all_results.extend(new_results)
-
-        # Save combined results
-        with open("coverage_results.json", "w", encoding="utf-8") as f:
-            json.dump(all_results, f, indent=2)
-
-        print(f"\nAdded {len(new_results)} new results to coverage_results.json")
+    negative_cache.save()
+    if source_stats is not None:
+        source_stats.save()
+    if refresh_state is not None:
+        refresh_state.save()
+    if line_counter is not None:
+        line_counter.close()
+
+    if skipped_count > 0:
+        print(f"\n🔄 Skipped {skipped_count} repositories with existing coverage data")
+    filter_stats = get_filter_stats()
+    if filter_stats.prefiltered or filter_stats.negative_skipped:
+        print(
+            f"🧹 Pre-filter dropped {filter_stats.prefiltered} likely non-code repositories, "
+            f"negative cache skipped {filter_stats.negative_skipped} "
+            f"(~{filter_stats.requests_saved} requests saved)"
+        )
+    if claimed_elsewhere > 0:
+        print(f"🔒 Skipped {claimed_elsewhere} repositories claimed by other workers")
+
+    if added and leases is not None:
+        print(
+            f"\nAdded {added} new results to {results_path} "
+            f"(combine with 'python main.py merge')"
+        )
+    elif added:
+        print(f"\nAdded {added} new results to {results_path}")
     else:
         print("\nNo new results to save")
 
     # Summary
-    successful = [r for r in results if r.coverage_percentage is not None]
+    print(f"\nSummary: {successful}/{added} repositories analyzed successfully")
+    if successful:
+        print(f"Average coverage: {coverage_total / successful:.1f}%")
+
+    http_stats = get_http_stats()
     print(
-        f"\nSummary: {len(successful)}/{len(results)} repositories analyzed successfully"
+        f"🔌 HTTP: {http_stats.requests} requests, {http_stats.new_connections} new connections, "
+        f"{http_stats.reused_connections} reused, {http_stats.retries} retries"
     )
-    if successful:
-        coverage_values = [
-            r.coverage_percentage
-            for r in successful
-            if r.coverage_percentage is not None
-        ]
-        avg_coverage = sum(coverage_values) / len(coverage_values)
-        print(f"Average coverage: {avg_coverage:.1f}%")
+    cache_stats = get_cache_stats()
+    if cache_stats is not None:
+        print(
+            f"🗄️  Cache: {cache_stats.hits} fresh hits, {cache_stats.revalidated} revalidated (304), "
+            f"{cache_stats.misses} misses, {cache_stats.evictions} evicted"
+        )
+    if source_stats is not None and source_stats.plan_stats.repos:
+        plan_stats = source_stats.plan_stats
+        print(
+            f"🧭 Adaptive source order: {plan_stats.reordered}/{plan_stats.repos} repos "
+            f"reordered, {plan_stats.skipped_lookups} lookups skipped, "
+            f"~{plan_stats.seconds_saved:.0f}s and ~{plan_stats.lookups_saved:.0f} "
+            f"requests saved (estimated)"
+        )
+    health_stats, open_hosts = get_host_health_stats()
+    if health_stats.trips:
+        print(
+            f"🔴 Circuit breakers: {health_stats.trips} trips, "
+            f"{health_stats.rejected} requests not sent"
+            + (f", still open for {', '.join(open_hosts)}" if open_hosts else "")
+        )
+    rate_limit_stats = get_rate_limit_stats()
+    if rate_limit_stats.rate_limited or rate_limit_stats.pauses:
+        print(
+            f"⏳ Rate limits: {rate_limit_stats.rate_limited} limited responses, "
+            f"{rate_limit_stats.pauses} pauses ({rate_limit_stats.paused_seconds:.0f}s)"
+        )
+
+    if profile_path:
+        print_stage_summary()
+        write_profile(profile_path)
+        print(f"📈 Wrote run profile to {profile_path}")
+    if cpu_profile_path and write_cpu_profile(cpu_profile_path):
+        print(
+            f"🧮 Wrote CPU profile of the parsing stages to {cpu_profile_path} "
+            f"(python -m pstats {cpu_profile_path})"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+Bounded concurrency helpers for processing repositories in parallel
+"""
+
+import io
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Maximum number of in-flight requests per host when running with --workers
+DEFAULT_HOST_LIMITS = {
+    "api.github.com": 8,
+    "coveralls.io": 4,
+    "img.shields.io": 4,
+}
+
+_host_limits: dict[str, int] = dict(DEFAULT_HOST_LIMITS)
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+
+def set_host_limit(host: str, limit: int) -> None:
+    """Set the maximum number of concurrent requests for a host"""
+    if limit < 1:
+        raise ValueError(f"Host limit for {host} must be at least 1")
+    with _host_lock:
+        _host_limits[host] = limit
+        _host_semaphores.pop(host, None)
+
+
+def _get_semaphore(host: str) -> Optional[threading.BoundedSemaphore]:
+    with _host_lock:
+        if host not in _host_limits:
+            return None
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(_host_limits[host])
+        return _host_semaphores[host]
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the concurrency slots for the URL's host while a request runs"""
+    semaphore = _get_semaphore(urlparse(url).hostname or "")
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
+
+
+class _ThreadLocalStdout(io.TextIOBase):
+    """Stdout proxy that diverts writes into a per-thread buffer when one is set"""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+        self.local = threading.local()
+
+    def write(self, s: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(s)
+        return self.target.write(s)
+
+    def flush(self) -> None:
+        if getattr(self.local, "buffer", None) is None:
+            self.target.flush()
+
+
+def _install_stdout_proxy() -> _ThreadLocalStdout:
+    if not isinstance(sys.stdout, _ThreadLocalStdout):
+        sys.stdout = _ThreadLocalStdout(sys.stdout)
+    return sys.stdout
+
+
+def current_output_buffer() -> Optional[io.StringIO]:
+    """Return the output buffer of the calling thread, if its output is captured"""
+    if isinstance(sys.stdout, _ThreadLocalStdout):
+        return getattr(sys.stdout.local, "buffer", None)
+    return None
+
+
+@contextmanager
+def captured_output(buffer: Optional[io.StringIO]):
+    """Redirect prints made by the calling thread into buffer"""
+    if buffer is None:
+        yield
+        return
+    proxy = _install_stdout_proxy()
+    previous = getattr(proxy.local, "buffer", None)
+    proxy.local.buffer = buffer
+    try:
+        yield
+    finally:
+        proxy.local.buffer = previous
+
+
+def _run_captured(task: Callable[[T], R], item: T) -> tuple[R, str]:
+    buffer = io.StringIO()
+    with captured_output(buffer):
+        result = task(item)
+    return result, buffer.getvalue()
+
+
+def process_in_order(
+    items: Iterable[T], task: Callable[[T], R], workers: int = 1
+) -> Iterator[tuple[T, R, str]]:
+    """Run task over items with up to `workers` threads, yielding results in input order
+
+    Each yielded tuple is (item, result, output). With more than one worker, everything
+    the task prints is captured into output so the caller can replay it and keep the
+    log identical to a serial run; serial runs print live and return an empty output.
+    At most 2 * workers items are in flight at any time.
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, task(item), ""
+        return
+
+    _install_stdout_proxy()
+    pending: deque[tuple[T, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            pending.append((item, executor.submit(_run_captured, task, item)))
+            if len(pending) >= workers * 2:
+                done_item, future = pending.popleft()
+                yield (done_item, *future.result())
+        while pending:
+            done_item, future = pending.popleft()
+            yield (done_item, *future.result())
+
+
+class _ProducerFailed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_PRODUCER_DONE = object()
+
+
+def prefetch(items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """Pull items from a background thread into a bounded queue as the caller consumes them
+
+    The producer runs at most `maxsize` items ahead of the consumer and stops as soon as
+    the consumer does. Exceptions raised by the producer are re-raised in the consumer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            put(_ProducerFailed(e))
+            return
+        put(_PRODUCER_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _PRODUCER_DONE:
+                return
+            if isinstance(item, _ProducerFailed):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
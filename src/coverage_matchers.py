@@ -0,0 +1,283 @@
+"""
+Precompiled matchers that find coverage figures in README and coverage page text
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Optional
+
+# Candidate kinds yielded by iter_readme_candidates
+PERCENTAGE = "percentage"
+CODECOV_BADGE = "codecov_badge"
+
+# Every README pattern starts with one of these literals, so the only offsets where
+# a pattern can match are the occurrences of its literal
+_CODECOV = "codecov.io/"
+_COVERALLS = "coveralls.io/"
+_SHIELDS = "img.shields.io/"
+_COVERAGE = "coverage"
+
+# Badge URL patterns, tried at their anchor as (integer, decimal) pairs
+_CODECOV_PERCENTAGES = (
+    re.compile(r"codecov\.io/.*?(\d+)%"),
+    re.compile(r"codecov\.io/.*?(\d+\.\d+)%"),
+)
+_COVERALLS_PERCENTAGES = (
+    re.compile(r"coveralls\.io/.*?(\d+)%"),
+    re.compile(r"coveralls\.io/.*?(\d+\.\d+)%"),
+)
+_SHIELDS_PERCENTAGES = (
+    re.compile(r"img\.shields\.io/.*?coverage[/-](\d+)%"),
+    re.compile(r"img\.shields\.io/.*?coverage[/-](\d+\.\d+)%"),
+)
+# Shields.io Codecov badges (the number lives in the badge SVG)
+_SHIELDS_CODECOV = re.compile(r"img\.shields\.io/codecov/c/github/([^/]+/[^/]+)")
+
+# After "coverage:?\s*" the text decides whether the integer or the decimal form
+# matches, so one match per anchor answers both, with or without a "test "/"code " prefix
+_TEXT_COVERAGE = re.compile(r"coverage:?\s*(\d+)(\.\d+)?%")
+_TEXT_PREFIXES = ("", "test ", "code ")
+
+SHIELDS_BADGE_PERCENTAGE = re.compile(r">(\d+(?:\.\d+)?)%<")
+
+
+def _find_all(content: str, literal: str) -> list[int]:
+    positions = []
+    position = content.find(literal)
+    while position != -1:
+        positions.append(position)
+        position = content.find(literal, position + 1)
+    return positions
+
+
+def _first_pair_matches(
+    content: str, positions: list[int], patterns: tuple[re.Pattern, re.Pattern]
+) -> list[str | None]:
+    """First integer and first decimal match of a badge URL pattern pair
+
+    The patterns cannot cross a newline and an earlier anchor can always stretch to
+    whatever a later anchor on the same line reaches, so once an anchor fails the rest
+    of its line is skipped. Lines without a "%" after the anchor are skipped untried.
+    """
+    found: list[str | None] = [None, None]
+    skip_until = [0, 0]
+    for position in positions:
+        if position < min(skip_until):
+            continue
+        line_end = content.find("\n", position)
+        if line_end == -1:
+            line_end = len(content)
+        if content.find("%", position, line_end) == -1:
+            skip_until = [line_end, line_end]
+            continue
+        for i, pattern in enumerate(patterns):
+            if found[i] is not None or position < skip_until[i]:
+                continue
+            match = pattern.match(content, position)
+            if match:
+                found[i] = match.group(1)
+            else:
+                skip_until[i] = line_end
+        if None not in found:
+            break
+    return found
+
+
+def _codecov_badges(content: str, positions: list[int]) -> list[str]:
+    """Every owner/name referenced by a shields.io Codecov badge, like re.findall"""
+    badges = []
+    last_end = 0
+    for position in positions:
+        if position < last_end:
+            continue
+        match = _SHIELDS_CODECOV.match(content, position)
+        if match:
+            badges.append(match.group(1))
+            last_end = match.end()
+    return badges
+
+
+def _first_text_matches(
+    content: str, positions: list[int]
+) -> dict[tuple[str, bool], str]:
+    """First "[test |code ]coverage: N%" match for each prefix, integer and decimal"""
+    wanted = {
+        (prefix, decimal) for prefix in _TEXT_PREFIXES for decimal in (False, True)
+    }
+    found: dict[tuple[str, bool], str] = {}
+    for position in positions:
+        match = _TEXT_COVERAGE.match(content, position)
+        if match is None:
+            continue
+        integer, fraction = match.groups()
+        decimal = fraction is not None
+        value = integer + fraction if decimal else integer
+        found.setdefault(("", decimal), value)
+        if position >= 5:
+            found.setdefault((content[position - 5 : position], decimal), value)
+        if wanted <= found.keys():
+            break
+    return found
+
+
+def iter_readme_candidates(content: str) -> Iterator[tuple[str, str]]:
+    """Yield (kind, value) coverage candidates from lowercased README text in priority order
+
+    Percentage patterns yield only their first match, codecov badge patterns yield every
+    owner/name they reference. Each anchor literal is located once and every pattern is
+    only tried at its anchor offsets; candidates are produced lazily, so callers that
+    stop at the first usable one never evaluate the lower-priority patterns.
+    """
+    shields = _find_all(content, _SHIELDS)
+
+    for value in _first_pair_matches(
+        content, _find_all(content, _CODECOV), _CODECOV_PERCENTAGES
+    ):
+        if value is not None:
+            yield PERCENTAGE, value
+    for badge in _codecov_badges(content, shields):
+        yield CODECOV_BADGE, badge
+    for value in _first_pair_matches(
+        content, _find_all(content, _COVERALLS), _COVERALLS_PERCENTAGES
+    ):
+        if value is not None:
+            yield PERCENTAGE, value
+    for value in _first_pair_matches(content, shields, _SHIELDS_PERCENTAGES):
+        if value is not None:
+            yield PERCENTAGE, value
+
+    text_matches = _first_text_matches(content, _find_all(content, _COVERAGE))
+    for prefix in _TEXT_PREFIXES:
+        for decimal in (False, True):
+            value = text_matches.get((prefix, decimal))
+            if value is not None:
+                yield PERCENTAGE, value
+
+
+def readme_coverage_settled(content: str) -> bool:
+    """True if a prefix of lower-cased README text already decides its coverage figure
+
+    Only the highest-priority pattern can decide it: its first match is yielded first,
+    and on complete lines that match cannot change whatever text follows.
+    """
+    complete = content[: content.rfind("\n") + 1]
+    value = _first_pair_matches(
+        complete, _find_all(complete, _CODECOV), _CODECOV_PERCENTAGES
+    )[0]
+    return value is not None and int(value) <= 100
+
+
+# Coveralls page patterns in priority order; the last two are broad and only count
+# when a coverage keyword sits within 100 characters on the same line
+_COVERALLS_PAGE_PATTERNS = [
+    re.compile(
+        r'<div class="coverageText repo-coverage-outline[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%'
+    ),
+    re.compile(r'id="repoShowPercentage"[^>]*>\s*(\d+(?:\.\d+)?)%'),
+    re.compile(r"<div[^>]*>\s*(\d+(?:\.\d+)?)%\s*</div>"),
+    re.compile(r'class="[^"]*coverage[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%'),
+]
+_COVERALLS_BROAD_PATTERNS = [
+    re.compile(r">(\d+(?:\.\d+)?)%<"),
+    re.compile(r"(\d+(?:\.\d+)?)%"),
+]
+
+# The keywords are "coverage", "covered" and "cover"; the window after a keyword is
+# measured from its longest spelling, the window before one needs only "cover"
+_COVER_KEYWORD = re.compile(r"cover(?:age|ed)?", re.IGNORECASE)
+_KEYWORD_LENGTH = 5
+_CONTEXT_WINDOW = 100
+_PERCENT_RUN = re.compile(r"[\d.]+%")
+# Longer numbers are located with a direct scan instead of being indexed
+_MAX_INDEXED_LENGTH = 32
+
+
+class CoverageContextIndex:
+    """Answers "is some occurrence of N% near a coverage keyword?" in O(log n)
+
+    The page is scanned once for keyword offsets, line breaks and every "N%" (including
+    the tails of longer numbers such as the "5%" in "15%"). A candidate then needs one
+    binary search per occurrence instead of a fresh regex search over the whole page.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        keywords = list(_COVER_KEYWORD.finditer(content))
+        self.keywords = [match.start() for match in keywords]
+        self.keyword_ends = [match.end() for match in keywords]
+        self.newlines = _find_all(content, "\n")
+        self.occurrences: dict[str, list[int]] = {}
+        for match in _PERCENT_RUN.finditer(content):
+            run, percent = match.group()[:-1], match.end() - 1
+            for length in range(1, min(len(run), _MAX_INDEXED_LENGTH) + 1):
+                self.occurrences.setdefault(run[-length:], []).append(percent - length)
+        self._answers: dict[str, bool] = {}
+
+    def has_context(self, value: str) -> bool:
+        """True if value% appears within a coverage keyword's window on the same line"""
+        if value not in self._answers:
+            if len(value) > _MAX_INDEXED_LENGTH:
+                starts = _find_all(self.content, value + "%")
+            else:
+                starts = self.occurrences.get(value, [])
+            self._answers[value] = any(
+                self._near_keyword(start, start + len(value) + 1) for start in starts
+            )
+        return self._answers[value]
+
+    def _near_keyword(self, start: int, end: int) -> bool:
+        line = bisect_right(self.newlines, start)
+        line_start = self.newlines[line - 1] + 1 if line else 0
+        line_end = self.newlines[line] if line < len(self.newlines) else float("inf")
+
+        # Keyword before the number: "cover" ... up to 100 chars ... "N%"
+        before = bisect_right(self.keywords, start - _KEYWORD_LENGTH) - 1
+        if before >= 0:
+            keyword = self.keywords[before]
+            reach = self.keyword_ends[before] + _CONTEXT_WINDOW
+            if keyword >= line_start and start <= reach:
+                return True
+
+        # Keyword after the number: "N%" ... up to 100 chars ... "cover"
+        after = bisect_left(self.keywords, end)
+        if after < len(self.keywords):
+            keyword = self.keywords[after]
+            if (
+                keyword <= end + _CONTEXT_WINDOW
+                and keyword + _KEYWORD_LENGTH <= line_end
+            ):
+                return True
+        return False
+
+
+def coveralls_coverage_settled(content: str) -> bool:
+    """True if a prefix of a Coveralls page already decides its coverage figure
+
+    As for READMEs, only a match of the highest-priority pattern (the repo coverage
+    badge near the top of the page) is final before the whole page has been seen.
+    """
+    return any(
+        0 <= float(match.group(1)) <= 100
+        for match in _COVERALLS_PAGE_PATTERNS[0].finditer(content)
+    )
+
+
+def find_coveralls_coverage(content: str) -> Optional[float]:
+    """Find the repository coverage percentage on a Coveralls HTML page"""
+    for pattern in _COVERALLS_PAGE_PATTERNS:
+        for match in pattern.finditer(content):
+            coverage = float(match.group(1))
+            if 0 <= coverage <= 100:
+                return coverage
+
+    context: Optional[CoverageContextIndex] = None
+    for pattern in _COVERALLS_BROAD_PATTERNS:
+        for match in pattern.finditer(content):
+            value = match.group(1)
+            coverage = float(value)
+            if 0 <= coverage <= 100:
+                if context is None:
+                    context = CoverageContextIndex(content)
+                if context.has_context(value):
+                    return coverage
+    return None
@@ -0,0 +1,100 @@
+"""
+Coverage from the Coveralls and Codecov JSON APIs, read with a field-targeted parser
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from src.host_health import HostUnavailableError
+from src.http_client import http_get
+from src.metrics import timed
+from src.models import RepoInfo
+
+CODECOV_API = "https://api.codecov.io/api/v2/github"
+CODECOV_API_SOURCE = "Codecov API"
+
+_NUMBER = rb"(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)"
+
+# Coveralls: {"covered_percent": 87.1, ...} at the top level of /github/{owner}/{name}.json
+_COVERALLS_PERCENT = re.compile(rb'"covered_percent"\s*:\s*' + _NUMBER)
+
+# Codecov: {"totals": {..., "coverage": 87.1, ...}, ...}; "coverage" only occurs in totals
+_CODECOV_TOTALS = re.compile(rb'"totals"\s*:\s*(\{|null)')
+_CODECOV_COVERAGE = re.compile(rb'"coverage"\s*:\s*' + _NUMBER)
+
+
+@dataclass
+class CoverageSource:
+    name: str
+    lookup: Callable[[RepoInfo], Optional[float]]
+
+
+def _percentage(value: bytes) -> Optional[float]:
+    coverage = float(value)
+    return round(coverage, 2) if 0 <= coverage <= 100 else None
+
+
+def find_json_number(body: bytes, field: re.Pattern, start: int = 0) -> Optional[float]:
+    """Pull one numeric field out of a JSON body without decoding the whole document"""
+    match = field.search(body, start)
+    return _percentage(match.group(1)) if match else None
+
+
+def parse_coveralls_json(body: bytes) -> Optional[float]:
+    return find_json_number(body, _COVERALLS_PERCENT)
+
+
+def parse_codecov_json(body: bytes) -> Optional[float]:
+    totals = _CODECOV_TOTALS.search(body)
+    if totals is None or totals.group(1) == b"null":
+        return None
+    return find_json_number(body, _CODECOV_COVERAGE, totals.end())
+
+
+@timed("coveralls_api")
+def coveralls_api_coverage(repo: RepoInfo) -> Optional[float]:
+    """Latest build coverage from https://coveralls.io/github/{owner}/{name}.json"""
+    try:
+        url = f"https://coveralls.io/github/{repo.owner}/{repo.name}.json"
+        response = http_get(
+            url,
+            headers={"Accept": "application/json"},
+            timeout=30,
+            raise_unavailable=True,
+        )
+        if response.status_code != 200:
+            return None
+        return parse_coveralls_json(response.content)
+    except HostUnavailableError:
+        raise
+    except Exception:
+        return None
+
+
+def codecov_coverage(slug: str) -> Optional[float]:
+    """Default-branch coverage of github.com/{slug} from the Codecov API v2"""
+    owner, _, name = slug.partition("/")
+    response = http_get(
+        f"{CODECOV_API}/{owner}/repos/{name}/", timeout=30, raise_unavailable=True
+    )
+    if response.status_code != 200:
+        return None
+    return parse_codecov_json(response.content)
+
+
+@timed("codecov_api")
+def codecov_api_coverage(repo: RepoInfo) -> Optional[float]:
+    try:
+        return codecov_coverage(f"{repo.owner}/{repo.name}")
+    except HostUnavailableError:
+        raise
+    except Exception:
+        return None
+
+
+# Tried after the README, before falling back to scraping the Coveralls page
+API_SOURCES = [
+    CoverageSource("Coveralls API", coveralls_api_coverage),
+    CoverageSource(CODECOV_API_SOURCE, codecov_api_coverage),
+]
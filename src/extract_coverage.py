@@ -2,92 +2,132 @@
 Extract coverage data from README files and coverage services
 """
 
-import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Optional
-import os
+from functools import partial
+from typing import Any, Callable, Optional
+import io
+import threading
+import time
 
-import requests
 from dotenv import load_dotenv
 
+from src.concurrency import captured_output
+from src.coverage_sources import API_SOURCES, CODECOV_API_SOURCE, codecov_coverage
+from src.coverage_matchers import (
+    CODECOV_BADGE,
+    SHIELDS_BADGE_PERCENTAGE,
+    coveralls_coverage_settled,
+    find_coveralls_coverage,
+    iter_readme_candidates,
+    readme_coverage_settled,
+)
+from src.graphql_fetcher import RepoDetails, take_repo_details
+from src.host_health import HostUnavailableError, unavailable_error
+from src.http_client import http_get, http_get_text
+from src.line_counter import count_repo_lines
+from src.metrics import profiled, profiled_iter, stage, timed
 from src.models import RepoInfo, CoverageResult
+from src.source_stats import get_source_stats
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Seconds a racing extraction waits for its lookups before settling for what it has
+DEFAULT_RACE_DEADLINE = 60.0
 
-def extract_coverage_from_readme(repo: RepoInfo) -> Optional[float]:
-    """Extract coverage percentage from README.md"""
+# Lookup threads each racing extraction needs (size plus four coverage lookups)
+RACE_THREADS_PER_REPO = 5
+
+_race_workers = 1
+_race_executor: Optional[ThreadPoolExecutor] = None
+_race_executor_lock = threading.Lock()
+
+# A coverage figure and the source that produced it
+Found = tuple[float, str]
+
+
+@timed("readme")
+def extract_coverage_from_readme(
+    repo: RepoInfo, details: Optional[RepoDetails] = None
+) -> Optional[Found]:
+    """Extract coverage percentage from README.md (see find_readme_coverage)"""
     try:
-        # Fetch README from GitHub API
+        if details is not None and details.readme is not None:
+            # Already fetched in a GraphQL batch
+            return find_readme_coverage(details.readme.lower())
+
+        # Fetch README from GitHub API, stopping once the top of it settles the figure
         url = f"https://api.github.com/repos/{repo.owner}/{repo.name}/readme"
         headers = {"Accept": "application/vnd.github.v3.raw"}
 
-        response = requests.get(url, headers=headers, timeout=30)
-        if response.status_code != 200:
+        body = http_get_text(
+            url,
+            headers=headers,
+            timeout=30,
+            done=lambda text: readme_coverage_settled(text.lower()),
+            raise_unavailable=True,
+        )
+        if body.status_code != 200:
             return None
 
-        content = response.text.lower()
-
-        # Common coverage badge patterns
-        coverage_patterns = [
-            # Codecov badge URLs
-            r"codecov\.io/.*?(\d+)%",
-            r"codecov\.io/.*?(\d+\.\d+)%",
-            # Shields.io Codecov badges (need to fetch the actual badge)
-            r"img\.shields\.io/codecov/c/github/([^/]+/[^/]+)",
-            # Coveralls badge URLs
-            r"coveralls\.io/.*?(\d+)%",
-            r"coveralls\.io/.*?(\d+\.\d+)%",
-            # Generic coverage badges
-            r"img\.shields\.io/.*?coverage[/-](\d+)%",
-            r"img\.shields\.io/.*?coverage[/-](\d+\.\d+)%",
-            # Text patterns
-            r"coverage:?\s*(\d+)%",
-            r"coverage:?\s*(\d+\.\d+)%",
-            r"test coverage:?\s*(\d+)%",
-            r"test coverage:?\s*(\d+\.\d+)%",
-            r"code coverage:?\s*(\d+)%",
-            r"code coverage:?\s*(\d+\.\d+)%",
-        ]
-
-        for pattern in coverage_patterns:
-            matches = re.findall(pattern, content)
-            if matches:
-                # Special handling for shields.io codecov badges
-                if pattern == r"img\.shields\.io/codecov/c/github/([^/]+/[^/]+)":
-                    for match in matches:
-                        try:
-                            # Fetch the actual badge SVG
-                            badge_url = (
-                                f"https://img.shields.io/codecov/c/github/{match}.svg"
-                            )
-                            badge_response = requests.get(badge_url, timeout=10)
-                            if badge_response.status_code == 200:
-                                # Extract percentage from SVG content
-                                badge_matches = re.findall(
-                                    r">(\d+(?:\.\d+)?)%<", badge_response.text
-                                )
-                                if badge_matches:
-                                    coverage = float(badge_matches[0])
-                                    if 0 <= coverage <= 100:
-                                        return coverage
-                        except Exception:
-                            continue
-                else:
-                    try:
-                        coverage = float(matches[0])
-                        if 0 <= coverage <= 100:
-                            return coverage
-                    except ValueError:
-                        continue
-
-        return None
+        return find_readme_coverage(body.text.lower())
 
+    except HostUnavailableError:
+        raise
     except Exception:
         return None
 
 
+def find_readme_coverage(content: str) -> Optional[Found]:
+    """Return the first usable coverage figure in lower-cased README text, with its source
+
+    Codecov badges resolved through the Codecov API count as "Codecov API"; figures
+    read off the README text or a badge image count as "README". Raises
+    HostUnavailableError if a badge could not be resolved because its hosts are
+    unavailable and no other candidate gave a figure.
+    """
+    unavailable: Optional[HostUnavailableError] = None
+    for kind, value in profiled_iter("readme_parse", iter_readme_candidates(content)):
+        # Codecov badges: ask the Codecov API, then read the number off the shields.io SVG
+        if kind == CODECOV_BADGE:
+            try:
+                with stage("badge"):
+                    coverage = codecov_coverage(value)
+                if coverage is not None:
+                    return coverage, CODECOV_API_SOURCE
+            except HostUnavailableError as e:
+                unavailable = e
+            except Exception:
+                pass
+            try:
+                badge_url = f"https://img.shields.io/codecov/c/github/{value}.svg"
+                with stage("badge"):
+                    badge_response = http_get(
+                        badge_url, timeout=10, raise_unavailable=True
+                    )
+                if badge_response.status_code == 200:
+                    badge_match = SHIELDS_BADGE_PERCENTAGE.search(badge_response.text)
+                    if badge_match:
+                        coverage = float(badge_match.group(1))
+                        if 0 <= coverage <= 100:
+                            return coverage, "README"
+            except HostUnavailableError as e:
+                unavailable = e
+            except Exception:
+                continue
+        else:
+            coverage = float(value)
+            if 0 <= coverage <= 100:
+                return coverage, "README"
+
+    if unavailable is not None:
+        raise unavailable
+    return None
+
+
+@timed("coveralls")
 def extract_coverage_from_coveralls(repo: RepoInfo) -> Optional[float]:
     """Extract coverage from coveralls.io"""
     try:
@@ -96,70 +136,51 @@ def extract_coverage_from_coveralls(repo: RepoInfo) -> Optional[float]:
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
 
-        response = requests.get(url, headers=headers, timeout=30)
-        print(f"    Coveralls URL: {url} (Status: {response.status_code})")
-        if response.status_code != 200:
+        body = http_get_text(
+            url,
+            headers=headers,
+            timeout=30,
+            done=coveralls_coverage_settled,
+            raise_unavailable=True,
+        )
+        print(f"    Coveralls URL: {url} (Status: {body.status_code})")
+        if body.status_code != 200:
             return None
 
-        content = response.text
-
-        # Look for coverage patterns (broader approach)
-        coverage_patterns = [
-            # Specific div structure mentioned by user
-            r'<div class="coverageText repo-coverage-outline[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%',
-            r'id="repoShowPercentage"[^>]*>\s*(\d+(?:\.\d+)?)%',
-            # Simple div with percentage (what we actually found)
-            r"<div[^>]*>\s*(\d+(?:\.\d+)?)%\s*</div>",
-            # Any element with coverage-related content
-            r'class="[^"]*coverage[^"]*"[^>]*>\s*(\d+(?:\.\d+)?)%',
-            # Very broad - any percentage that looks like coverage
-            r">(\d+(?:\.\d+)?)%<",
-            r"(\d+(?:\.\d+)?)%",
-        ]
-
-        for pattern in coverage_patterns:
-            matches = re.findall(pattern, content)
-            if matches:
-                for match in matches:
-                    try:
-                        coverage = float(match)
-                        if 0 <= coverage <= 100:
-                            # For broad patterns, check if it's in a coverage context
-                            if pattern in [r">(\d+(?:\.\d+)?)%<", r"(\d+(?:\.\d+)?)%"]:
-                                # Look for coverage-related words nearby
-                                coverage_context = re.search(
-                                    rf".{{0,100}}(?:coverage|covered|cover).{{0,100}}{re.escape(match)}%|{re.escape(match)}%.{{0,100}}(?:coverage|covered|cover)",
-                                    content,
-                                    re.IGNORECASE,
-                                )
-                                if coverage_context:
-                                    return coverage
-                            else:
-                                return coverage
-                    except ValueError:
-                        continue
-
-        return None
+        with profiled("coveralls_parse"):
+            return find_coveralls_coverage(body.text)
 
+    except HostUnavailableError:
+        raise
     except Exception:
         return None
 
 
-def get_repo_lines_of_code(repo: RepoInfo) -> Optional[int]:
-    """Get total lines of code from GitHub API using language statistics"""
-    try:
-        # Get languages breakdown
-        url = f"https://api.github.com/repos/{repo.owner}/{repo.name}/languages"
-        headers = {}
-        token = os.getenv("GITHUB_TOKEN")
-        if token:
-            headers["Authorization"] = f"token {token}"
-
-        response = requests.get(url, headers=headers, timeout=30)
-        if response.status_code != 200:
-            return None
+@timed("size")
+def get_repo_lines_of_code(
+    repo: RepoInfo, details: Optional[RepoDetails] = None
+) -> Optional[int]:
+    """Get total lines of code from GitHub API using language statistics
 
-        languages = response.json()
+    With exact counting enabled, the lines in the repo tarball are counted instead,
+    falling back to the estimate if that fails.
+    """
+    try:
+        exact_lines = count_repo_lines(repo)
+        if exact_lines is not None:
+            return exact_lines
+
+        if details is not None:
+            # Already fetched in a GraphQL batch
+            languages = details.languages
+        else:
+            # Get languages breakdown
+            url = f"https://api.github.com/repos/{repo.owner}/{repo.name}/languages"
+            response = http_get(url, timeout=30, raise_unavailable=True)
+            if response.status_code != 200:
+                return None
+
+            languages = response.json()
 
         # GitHub provides bytes, not lines
         # Rough estimation: average 40 bytes per line of code
@@ -168,62 +189,359 @@ def get_repo_lines_of_code(repo: RepoInfo) -> Optional[int]:
 
         return estimated_lines
 
+    except HostUnavailableError:
+        raise
     except Exception:
         return None
 
 
-def extract_coverage_smart(repo: RepoInfo) -> CoverageResult:
+# Default lookup order: cheapest and most common sources first, scraping last
+SOURCE_ORDER = ["README", *(api.name for api in API_SOURCES), "Coveralls.io"]
+
+NO_COVERAGE_ERROR = "No coverage data found in README, Coveralls or Codecov"
+
+# Before the JSON API sources, only the README and the Coveralls page were checked
+LEGACY_SOURCE_ORDER = ["README", "Coveralls.io"]
+LEGACY_NO_COVERAGE_ERROR = "No coverage data found in README or Coveralls"
+
+
+def sources_tried(record: dict[str, Any]) -> Optional[list[str]]:
+    """Sources a stored result ran through in the default order, ending with the one
+    that found its coverage; None for results that do not tell
+
+    A Coveralls page hit may predate the API sources, so the APIs are only counted
+    for results that show they existed.
+    """
+    source = record.get("source")
+    error = record.get("error")
+    if record.get("coverage") is not None:
+        if source in LEGACY_SOURCE_ORDER:
+            order = LEGACY_SOURCE_ORDER
+        elif source in SOURCE_ORDER:
+            order = SOURCE_ORDER
+        else:
+            return None
+        return order[: order.index(source) + 1]
+    if error == NO_COVERAGE_ERROR:
+        return list(SOURCE_ORDER)
+    if error == LEGACY_NO_COVERAGE_ERROR:
+        return list(LEGACY_SOURCE_ORDER)
+    return None
+
+
+def _found_as(
+    source: str, lookup: Callable[[], Optional[float]]
+) -> Callable[[], Optional[Found]]:
+    """lookup, with its figure attributed to source"""
+
+    def found() -> Optional[Found]:
+        coverage = lookup()
+        return None if coverage is None else (coverage, source)
+
+    return found
+
+
+def coverage_lookups(
+    repo: RepoInfo, details: Optional[RepoDetails] = None
+) -> list[tuple[str, str, Callable[[], Optional[Found]]]]:
+    """(source, progress line, lookup) in priority order
+
+    A lookup's figure may come from another source than the one it is named after
+    (README Codecov badges are resolved through the Codecov API).
+
+    By default the README comes first, then the JSON APIs, then the Coveralls page
+    scraper as the fallback (SOURCE_ORDER). With adaptive ordering enabled, the
+    order (and which sources are tried at all) follows the source statistics for
+    the repo's language.
+    """
+    lookups: list[tuple[str, str, Callable[[], Optional[Found]]]] = [
+        (
+            "README",
+            "  📖 Checking README for coverage...",
+            lambda: extract_coverage_from_readme(repo, details),
+        )
+    ]
+    for api in API_SOURCES:
+        lookups.append(
+            (
+                api.name,
+                f"  🔌 Checking {api.name}...",
+                _found_as(api.name, partial(api.lookup, repo)),
+            )
+        )
+    lookups.append(
+        (
+            "Coveralls.io",
+            "  🔍 Checking Coveralls.io...",
+            _found_as("Coveralls.io", lambda: extract_coverage_from_coveralls(repo)),
+        )
+    )
+    stats = get_source_stats()
+    if stats is None:
+        return lookups
+    by_source = {lookup[0]: lookup for lookup in lookups}
+    return [by_source[source] for source in stats.plan(SOURCE_ORDER, repo.language)]
+
+
+def _found_message(coverage: float, source: str) -> str:
+    where = "in README" if source == "README" else f"on {source}"
+    return f"  ✓ Found {coverage}% coverage {where}"
+
+
+@timed("repo")
+def extract_coverage_smart(
+    repo: RepoInfo, race: bool = False, deadline: float = DEFAULT_RACE_DEADLINE
+) -> CoverageResult:
     """Smart coverage extraction combining multiple sources"""
+    if race:
+        return extract_coverage_racing(repo, deadline)
+
     timestamp = datetime.now().isoformat()
+    details = take_repo_details(repo)
+
+    # Sources whose host is down are noted and skipped
+    unavailable: set[str] = set()
 
     # Get total lines of code
     print("  📊 Getting repository size...")
-    total_lines = get_repo_lines_of_code(repo)
+    total_lines = None
+    try:
+        total_lines = get_repo_lines_of_code(repo, details)
+    except HostUnavailableError as e:
+        print(f"  ⚡ {e}")
+        unavailable.add(e.host)
     if total_lines:
         print(f"  ✓ Estimated {total_lines:,} lines of code")
 
-    # Try README first
-    print("  📖 Checking README for coverage...")
-    coverage = extract_coverage_from_readme(repo)
-    source = "README"
-
-    if coverage is not None:
-        print(f"  ✓ Found {coverage}% coverage in README")
-        return CoverageResult(
-            repo=repo,
-            url=f"https://github.com/{repo.owner}/{repo.name}",
-            coverage_percentage=coverage,
-            total_lines=total_lines,
-            source=source,
-            error=None,
-            timestamp=timestamp,
-        )
+    # First source with a figure wins
+    stats = get_source_stats()
+    for source, progress, lookup in coverage_lookups(repo, details):
+        print(progress)
+        started = time.perf_counter()
+        try:
+            found = lookup()
+        except HostUnavailableError as e:
+            print(f"  ⚡ {e}")
+            unavailable.add(e.host)
+            continue
+        if stats is not None:
+            stats.record(
+                source,
+                repo.language,
+                found is not None,
+                time.perf_counter() - started,
+            )
+        if found is not None:
+            coverage, found_source = found
+            print(_found_message(coverage, found_source))
+            return CoverageResult(
+                repo=repo,
+                url=f"https://github.com/{repo.owner}/{repo.name}",
+                coverage_percentage=coverage,
+                total_lines=total_lines,
+                source=found_source,
+                error=None,
+                timestamp=timestamp,
+            )
+
+    # No coverage found; with a source down that is not a definite answer
+    if unavailable:
+        print("  ✗ Some coverage sources are unavailable, will retry later")
+    else:
+        print("  ✗ No coverage data found")
+    return CoverageResult(
+        repo=repo,
+        url=f"https://github.com/{repo.owner}/{repo.name}",
+        coverage_percentage=None,
+        total_lines=total_lines,
+        source=None,
+        error=unavailable_error(unavailable) if unavailable else NO_COVERAGE_ERROR,
+        timestamp=timestamp,
+    )
+
+
+def set_race_workers(workers: int) -> None:
+    """Size the shared lookup pool for this many repos racing at once"""
+    global _race_workers  # pylint: disable=global-statement
+    with _race_executor_lock:
+        _race_workers = max(1, workers)
+
+
+def _get_race_executor() -> ThreadPoolExecutor:
+    global _race_executor  # pylint: disable=global-statement
+    with _race_executor_lock:
+        if _race_executor is None:
+            _race_executor = ThreadPoolExecutor(
+                max_workers=_race_workers * RACE_THREADS_PER_REPO,
+                thread_name_prefix="race",
+            )
+        return _race_executor
+
+
+def _run_lookup(lookup: Callable[..., Any], *args) -> tuple[Any, str]:
+    """Run a lookup with its prints captured, so racing lookups do not interleave"""
+    buffer = io.StringIO()
+    with captured_output(buffer):
+        try:
+            value = lookup(*args)
+        except HostUnavailableError:
+            raise
+        except Exception:
+            value = None
+    return value, buffer.getvalue()
+
+
+class _RaceLookup:
+    """A lookup on the shared pool, which may queue behind lookups still holding threads
+
+    Coverage lookups (those given a source) are counted in the source statistics when
+    they finish, even after the race has moved on without them.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        lookup: Callable[..., Any],
+        *args,
+        source: Optional[str] = None,
+        language: str = "",
+    ):
+        self._started = threading.Event()
+        self._source = source
+        self._language = language
+        self.future: Future = executor.submit(self._run, lookup, *args)
+
+    def _run(self, lookup: Callable[..., Any], *args) -> tuple[Any, str]:
+        self._started.set()
+        started = time.perf_counter()
+        value, output = _run_lookup(lookup, *args)
+        stats = get_source_stats()
+        if stats is not None and self._source is not None:
+            stats.record(
+                self._source,
+                self._language,
+                value is not None,
+                time.perf_counter() - started,
+            )
+        return value, output
+
+    def wait(self, deadline_at: float) -> Optional[tuple[Any, str]]:
+        """The lookup's answer, or None if it has not answered by deadline_at
+
+        A lookup that has not even started by then is cancelled.
+        """
+        if not self._started.wait(max(0.0, deadline_at - time.monotonic())):
+            self.future.cancel()
+            return None
+        try:
+            return self.future.result(timeout=max(0.0, deadline_at - time.monotonic()))
+        except FutureTimeoutError:
+            return None
+
+
+def extract_coverage_racing(
+    repo: RepoInfo, deadline: float = DEFAULT_RACE_DEADLINE
+) -> CoverageResult:
+    """Start the size and all coverage lookups together and keep the best answer
 
-    # Try Coveralls as fallback
-    print("  🔍 Checking Coveralls.io...")
-    coverage = extract_coverage_from_coveralls(repo)
-    source = "Coveralls.io"
-
-    if coverage is not None:
-        print(f"  ✓ Found {coverage}% coverage on Coveralls")
-        return CoverageResult(
-            repo=repo,
-            url=f"https://github.com/{repo.owner}/{repo.name}",
-            coverage_percentage=coverage,
-            total_lines=total_lines,
-            source=source,
-            error=None,
-            timestamp=timestamp,
+    Sources still win in the usual order (see coverage_lookups); lower-priority
+    lookups are cancelled once a higher-priority one finds coverage. If the deadline
+    passes first, the highest-priority source that has already answered is used;
+    lookups still queued for a thread by then count as missed.
+    """
+    timestamp = datetime.now().isoformat()
+    details = take_repo_details(repo)
+    deadline_at = time.monotonic() + deadline
+    executor = _get_race_executor()
+
+    print("  🏁 Racing size and coverage lookups...")
+    size_lookup = _RaceLookup(executor, get_repo_lines_of_code, repo, details)
+    # (source, progress line, running lookup) in priority order
+    lookups = [
+        (
+            source,
+            progress,
+            _RaceLookup(executor, lookup, source=source, language=repo.language),
         )
+        for source, progress, lookup in coverage_lookups(repo, details)
+    ]
+
+    total_lines = None
+    unavailable: set[str] = set()
+    print("  📊 Getting repository size...")
+    try:
+        size = size_lookup.wait(deadline_at)
+    except HostUnavailableError as e:
+        print(f"  ⚡ {e}")
+        unavailable.add(e.host)
+    else:
+        if size is None:
+            print(f"  ⏱️  Size lookup missed the {deadline:g}s deadline")
+        else:
+            total_lines, output = size
+            print(output, end="")
+            if total_lines:
+                print(f"  ✓ Estimated {total_lines:,} lines of code")
+
+    coverage = None
+    source = None
+    timed_out = False
+    for _, progress, lookup in lookups:
+        try:
+            answer = lookup.wait(deadline_at)
+        except HostUnavailableError as e:
+            print(progress)
+            print(f"  ⚡ {e}")
+            unavailable.add(e.host)
+            continue
+        if answer is None:
+            timed_out = True
+            break
+        print(progress)
+        print(answer[1], end="")
+        if answer[0] is not None:
+            coverage, source = answer[0]
+            break
+
+    if timed_out:
+        # Past the deadline: settle for the best lookup that has already answered
+        for name, progress, lookup in lookups:
+            future = lookup.future
+            if future.done() and not future.cancelled():
+                if future.exception() is not None:
+                    continue
+                value, output = future.result()
+                if value is not None:
+                    print(progress)
+                    print(output, end="")
+                    coverage, source = value
+                    break
+            else:
+                print(f"  ⏱️  {name} lookup missed the {deadline:g}s deadline")
+
+    for _, _, lookup in lookups:
+        # Lookups that are already running finish in the background and are ignored
+        lookup.future.cancel()
+
+    if coverage is not None and source is not None:
+        print(_found_message(coverage, source))
+        error = None
+    elif timed_out:
+        print("  ✗ Coverage lookups ran out of time")
+        error = f"Coverage lookups exceeded the {deadline:g}s deadline"
+    elif unavailable:
+        print("  ✗ Some coverage sources are unavailable, will retry later")
+        error = unavailable_error(unavailable)
+    else:
+        print("  ✗ No coverage data found")
+        error = NO_COVERAGE_ERROR
 
-    # No coverage found
-    print("  ✗ No coverage data found")
     return CoverageResult(
         repo=repo,
         url=f"https://github.com/{repo.owner}/{repo.name}",
-        coverage_percentage=None,
+        coverage_percentage=coverage,
         total_lines=total_lines,
-        source=None,
-        error="No coverage data found in README or Coveralls",
+        source=source,
+        error=error,
         timestamp=timestamp,
     )
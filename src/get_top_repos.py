@@ -1,13 +1,75 @@
-import os
+from itertools import islice
+from typing import Iterator, Optional
 
-import requests
 from dotenv import load_dotenv
 
+from src.host_health import HostUnavailableError
+from src.http_client import http_get
+from src.metrics import stage
 from src.models import RepoInfo
+from src.rate_limit import is_rate_limited
+from src.repo_filter import count_prefiltered, non_code_reason
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Languages likely to have test suites
+CODE_LANGUAGES = {
+    "JavaScript",
+    "TypeScript",
+    "Python",
+    "Java",
+    "Go",
+    "Rust",
+    "C++",
+    "C#",
+    "Ruby",
+    "PHP",
+    "Kotlin",
+    "Swift",
+    "Scala",
+    "Dart",
+    "C",
+}
+
+
+def repo_from_search_item(
+    item: dict, skip_repos: list[str], prefer_code_langs: bool
+) -> Optional[RepoInfo]:
+    """Turn a search API item into a RepoInfo, or None if the repo should be skipped"""
+    repo_full_name = f"{item['owner']['login']}/{item['name']}"
+    language = item.get("language")
+    stars = item["stargazers_count"]
+
+    # Skip repos in the skip list
+    if repo_full_name in skip_repos:
+        print(f"⏭️  Skipping {repo_full_name} ({stars:,} ⭐, {language}) - in skip list")
+        return None
+
+    # If prefer_code_langs is True, skip non-code languages
+    if prefer_code_langs and language not in CODE_LANGUAGES:
+        print(
+            f"⏭️  Skipping {repo_full_name} ({stars:,} ⭐, {language}) - not a code language"
+        )
+        return None
+
+    # Documentation, lists and tutorials rarely report coverage; dropping them here
+    # costs nothing, since the search payload already has everything needed
+    reason = non_code_reason(item) if prefer_code_langs else None
+    if reason is not None:
+        count_prefiltered()
+        print(f"⏭️  Skipping {repo_full_name} ({stars:,} ⭐, {language}) - {reason}")
+        return None
+
+    print(f"✅ Found {repo_full_name} ({stars:,} ⭐, {language})")
+    return RepoInfo(
+        owner=item["owner"]["login"],
+        name=item["name"],
+        stars=stars,
+        language=language or "Unknown",
+        clone_url=item["clone_url"],
+    )
+
 
 def get_top_repos(
     count: int = 100,
@@ -17,37 +79,33 @@ def get_top_repos(
     start_rank: int = 1,
 ) -> list[RepoInfo]:
     """Fetch top repos by stars from GitHub"""
+    return list(
+        islice(
+            iter_top_repos(min_stars, skip_repos, prefer_code_langs, start_rank), count
+        )
+    )
+
+
+def iter_top_repos(
+    min_stars: int = 1000,
+    skip_repos: list[str] | None = None,
+    prefer_code_langs: bool = True,
+    start_rank: int = 1,
+) -> Iterator[RepoInfo]:
+    """Yield top repos by stars as each search page arrives
+
+    Pages are only requested when the caller asks for more repos, so consumers that
+    stop early never pay for the rest of the search.
+    """
     if skip_repos is None:
         skip_repos = []
 
-    # Languages likely to have test suites
-    code_languages = {
-        "JavaScript",
-        "TypeScript",
-        "Python",
-        "Java",
-        "Go",
-        "Rust",
-        "C++",
-        "C#",
-        "Ruby",
-        "PHP",
-        "Kotlin",
-        "Swift",
-        "Scala",
-        "Dart",
-        "C",
-    }
-
-    token = os.getenv("GITHUB_TOKEN")
-    headers = {"Authorization": f"token {token}"} if token else {}
-    repos: list[RepoInfo] = []
     # Calculate starting page based on start_rank
     start_page = ((start_rank - 1) // 100) + 1
     page = start_page
     items_to_skip = (start_rank - 1) % 100
 
-    while len(repos) < count:
+    while True:
         # If we're beyond page 10 or start_rank > 1000, use different search strategies
         if page > 10 or start_rank > 1000:
             # Use language-specific searches with lower thresholds to find different repos
@@ -74,7 +132,19 @@ def get_top_repos(
         else:
             url = f"https://api.github.com/search/repositories?q=stars:>{min_stars}&sort=stars&order=desc&page={page}&per_page=100"
 
-        response = requests.get(url, headers=headers, timeout=30)
+        try:
+            with stage("search"):
+                response = http_get(url, timeout=30)
+        except HostUnavailableError as e:
+            # GitHub keeps failing; stop here and let the next run resume
+            print(f"GitHub search is unavailable ({e}), stopping discovery")
+            break
+
+        if is_rate_limited(response):
+            # The shared client already waited for the budget to reset; skipping the
+            # page would silently drop repos, so stop here and let the next run resume
+            print("GitHub search is still rate limited, stopping discovery")
+            break
 
         if response.status_code != 200:
             print(
@@ -94,37 +164,10 @@ def get_top_repos(
             items_to_skip = 0  # Only skip on first page
 
         for item in items:
-            repo_full_name = f"{item['owner']['login']}/{item['name']}"
-            language = item.get("language")
-            stars = item["stargazers_count"]
-
-            # Skip repos in the skip list
-            if repo_full_name in skip_repos:
-                print(
-                    f"⏭️  Skipping {repo_full_name} ({stars:,} ⭐, {language}) - in skip list"
-                )
-                continue
-
-            # If prefer_code_langs is True, skip non-code languages
-            if prefer_code_langs and language not in code_languages:
-                print(
-                    f"⏭️  Skipping {repo_full_name} ({stars:,} ⭐, {language}) - not a code language"
-                )
-                continue
-
-            print(f"✅ Found {repo_full_name} ({stars:,} ⭐, {language})")
-            repos.append(
-                RepoInfo(
-                    owner=item["owner"]["login"],
-                    name=item["name"],
-                    stars=stars,
-                    language=language or "Unknown",
-                    clone_url=item["clone_url"],
-                )
-            )
+            repo = repo_from_search_item(item, skip_repos, prefer_code_langs)
+            if repo is not None:
+                yield repo
 
         if len(data["items"]) < 100:
             break
         page += 1
-
-    return repos[:count]
@@ -0,0 +1,150 @@
+"""
+Batched GitHub GraphQL lookups of README text and language sizes for many repos at once
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from src.http_client import http_post
+from src.metrics import timed
+from src.models import RepoInfo
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Overridable so the fetcher can run against a local stub server
+GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+
+# Repos per query; README blobs make responses large, so stay well under the node limit
+DEFAULT_BATCH_SIZE = 25
+
+# GraphQL has no equivalent of REST's /readme lookup, so ask for the common file names
+README_PATHS = ("README.md", "readme.md", "Readme.md", "README.rst", "README")
+
+_REPO_FIELDS = """
+    pushedAt
+    isArchived
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    languages(first: 100) { edges { size node { name } } }
+""" + "".join(
+    f'    readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}\n'
+    for i, path in enumerate(README_PATHS)
+)
+
+
+@dataclass
+class RepoDetails:
+    readme: Optional[str]
+    languages: dict[str, int] = field(default_factory=dict)
+    pushed_at: Optional[str] = None
+    topics: list[str] = field(default_factory=list)
+    is_archived: bool = False
+
+
+_details: dict[str, RepoDetails] = {}
+_details_lock = threading.Lock()
+
+
+def _repo_key(repo: RepoInfo) -> str:
+    return f"{repo.owner}/{repo.name}".lower()
+
+
+def build_query(repos: list[RepoInfo]) -> tuple[str, dict[str, str]]:
+    """One aliased repository() selection per repo, with owner and name as variables"""
+    params = []
+    selections = []
+    variables = {}
+    for i, repo in enumerate(repos):
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        selections.append(
+            f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{{_REPO_FIELDS}  }}"
+        )
+        variables[f"o{i}"] = repo.owner
+        variables[f"n{i}"] = repo.name
+    query = f"query({', '.join(params)}) {{\n" + "\n".join(selections) + "\n}"
+    return query, variables
+
+
+def _parse_repository(node: dict) -> RepoDetails:
+    readme = None
+    for i in range(len(README_PATHS)):
+        blob = node.get(f"readme{i}")
+        if blob and blob.get("text") is not None:
+            readme = blob["text"]
+            break
+    return RepoDetails(
+        readme=readme,
+        languages={
+            edge["node"]["name"]: edge["size"]
+            for edge in (node.get("languages") or {}).get("edges") or []
+        },
+        pushed_at=node.get("pushedAt"),
+        topics=[
+            topic_node["topic"]["name"]
+            for topic_node in (node.get("repositoryTopics") or {}).get("nodes") or []
+        ],
+        is_archived=bool(node.get("isArchived")),
+    )
+
+
+@timed("graphql")
+def fetch_repo_details(repos: list[RepoInfo]) -> dict[str, RepoDetails]:
+    """Fetch details for a batch of repos in a single GraphQL request
+
+    Repos the query could not resolve are left out, so callers fall back to REST.
+    """
+    if not repos:
+        return {}
+    query, variables = build_query(repos)
+    try:
+        response = http_post(
+            GRAPHQL_URL,
+            json={"query": query, "variables": variables},
+            timeout=60,
+        )
+        if response.status_code != 200:
+            print(f"⚠️  GraphQL batch failed: {response.status_code}")
+            return {}
+        data = response.json().get("data") or {}
+    except Exception as e:
+        print(f"⚠️  GraphQL batch failed: {e}")
+        return {}
+
+    details = {}
+    for i, repo in enumerate(repos):
+        node = data.get(f"r{i}")
+        if node:
+            details[_repo_key(repo)] = _parse_repository(node)
+    return details
+
+
+def prefetch_repo_details(
+    repos: Iterable[RepoInfo], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[RepoInfo]:
+    """Pass repos through, fetching details for each batch before handing it on"""
+    batch: list[RepoInfo] = []
+
+    def flush() -> Iterator[RepoInfo]:
+        details = fetch_repo_details(batch)
+        with _details_lock:
+            _details.update(details)
+        print(f"🧬 GraphQL: fetched details for {len(details)}/{len(batch)} repos")
+        yield from batch
+        batch.clear()
+
+    for repo in repos:
+        batch.append(repo)
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+
+def take_repo_details(repo: RepoInfo) -> Optional[RepoDetails]:
+    """Remove and return prefetched details for repo, if a batch included it"""
+    with _details_lock:
+        return _details.pop(_repo_key(repo), None)
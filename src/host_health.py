@@ -0,0 +1,140 @@
+"""
+Per-host adaptive timeouts and circuit breakers
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Results carrying this error are retried by later runs instead of counting as done
+UNAVAILABLE_ERROR_PREFIX = "Source unavailable"
+
+# Recent successful request latencies kept per host
+LATENCY_WINDOW = 200
+# Below this many samples the caller's timeout is used as is
+MIN_SAMPLES = 20
+# Timeout = p99 latency x this factor, never below MIN_TIMEOUT nor above the caller's
+P99_MULTIPLIER = 3.0
+MIN_TIMEOUT = 2.0
+
+# Consecutive failures that open a host's breaker
+FAILURE_THRESHOLD = 5
+# Seconds an open breaker rejects requests, doubling each time a probe fails
+COOL_DOWN = 60.0
+MAX_COOL_DOWN = 600.0
+
+# Responses that mean the host itself is in trouble (rate limits are handled elsewhere)
+FAILURE_STATUSES = (500, 502, 503, 504)
+
+
+class HostUnavailableError(Exception):
+    """Raised instead of sending a request to a host whose breaker is open, and for
+    lookups whose host still failed after retries (see http_get's raise_unavailable)"""
+
+    def __init__(self, host: str, retry_in: float = 0.0, reason: Optional[str] = None):
+        reason = reason or f"circuit open for {retry_in:.0f}s"
+        super().__init__(f"{host} is unavailable ({reason})")
+        self.host = host
+
+
+@dataclass
+class HealthStats:
+    trips: int = 0
+    rejected: int = 0
+
+
+@dataclass
+class HostState:
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    failures: int = 0
+    open_until: float = 0.0
+    cool_down: float = COOL_DOWN
+    probing: bool = False
+
+
+class HostHealth:
+    """Tracks each host's latency and failures, deciding timeouts and when to stop calling it
+
+    Breakers are closed (requests flow), open (requests fail fast for the cool-down) or
+    half-open (the cool-down passed and a single probe request decides).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: dict[str, HostState] = {}
+        self.stats = HealthStats()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState()
+        return state
+
+    def before_request(self, host: str, timeout: float) -> float:
+        """Timeout to use for a request to host; raises HostUnavailableError if open"""
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if state.open_until:
+                if now < state.open_until or state.probing:
+                    self.stats.rejected += 1
+                    raise HostUnavailableError(host, max(0.0, state.open_until - now))
+                # Half-open: let this one request through as a probe
+                state.probing = True
+            if len(state.latencies) < MIN_SAMPLES:
+                return timeout
+            ordered = sorted(state.latencies)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return min(timeout, max(MIN_TIMEOUT, p99 * P99_MULTIPLIER))
+
+    def record_success(self, host: str, seconds: float) -> None:
+        with self._lock:
+            state = self._state(host)
+            state.latencies.append(seconds)
+            state.failures = 0
+            if state.open_until:
+                print(f"🟢 {host} is answering again, resuming requests")
+            state.open_until = 0.0
+            state.cool_down = COOL_DOWN
+            state.probing = False
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            state = self._state(host)
+            state.failures += 1
+            if state.open_until:
+                if not state.probing:
+                    return  # sent before the breaker opened
+                # The half-open probe failed: back off for longer
+                state.cool_down = min(MAX_COOL_DOWN, state.cool_down * 2)
+            elif state.failures < FAILURE_THRESHOLD:
+                return
+            state.open_until = time.monotonic() + state.cool_down
+            state.probing = False
+            self.stats.trips += 1
+            print(
+                f"🔴 {host} failed {state.failures} times in a row, "
+                f"pausing requests for {state.cool_down:.0f}s"
+            )
+
+    def record_response(self, host: str, status: int, seconds: float) -> None:
+        if status in FAILURE_STATUSES:
+            self.record_failure(host)
+        else:
+            self.record_success(host, seconds)
+
+    def open_hosts(self) -> list[str]:
+        with self._lock:
+            return sorted(
+                host for host, state in self._hosts.items() if state.open_until
+            )
+
+
+def unavailable_error(hosts: set[str]) -> str:
+    return f"{UNAVAILABLE_ERROR_PREFIX}: {', '.join(sorted(hosts))}"
+
+
+def is_unavailable_record(record: dict) -> bool:
+    return (record.get("error") or "").startswith(UNAVAILABLE_ERROR_PREFIX)
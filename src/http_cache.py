@@ -0,0 +1,225 @@
+"""
+Persistent HTTP response cache with conditional revalidation (ETag / Last-Modified)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.json_state import unique_tmp_path
+
+DEFAULT_CACHE_DIR = ".http_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+HOUR = 60 * 60
+
+# (host, path pattern, seconds a stored response is served without asking the server).
+# Older entries are revalidated with a conditional request; unlisted URLs bypass the cache.
+CACHE_TTLS = [
+    ("api.github.com", re.compile(r"^/repos/[^/]+/[^/]+/readme$"), 6 * HOUR),
+    ("api.github.com", re.compile(r"^/repos/[^/]+/[^/]+/languages$"), 24 * HOUR),
+    ("api.github.com", re.compile(r"^/search/repositories$"), 1 * HOUR),
+    # Always revalidated: refresh checks need the current pushed_at, and 304s are free
+    ("api.github.com", re.compile(r"^/repos/[^/]+/[^/]+$"), 0),
+    ("api.github.com", re.compile(r"^/repos/[^/]+/[^/]+/commits/HEAD$"), 0),
+    ("img.shields.io", re.compile(r"^/codecov/"), 1 * HOUR),
+    ("coveralls.io", re.compile(r"^/github/"), 6 * HOUR),
+    ("api.codecov.io", re.compile(r"^/api/v2/github/"), 6 * HOUR),
+]
+
+# Response headers kept with a cached body
+_STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def cache_ttl(url: str) -> Optional[int]:
+    """Return the freshness lifetime for a URL, or None if it should not be cached"""
+    parsed = urlparse(url)
+    for host, path_pattern, ttl in CACHE_TTLS:
+        if parsed.hostname == host and path_pattern.match(parsed.path):
+            return ttl
+    return None
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    headers: dict[str, str]
+    stored_at: float
+    body: bytes
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers that let the server answer 304 Not Modified"""
+        validators = {}
+        if "ETag" in self.headers:
+            validators["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            validators["If-Modified-Since"] = self.headers["Last-Modified"]
+        return validators
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = self.body  # pylint: disable=protected-access
+        return response
+
+
+class HttpCache:
+    """Size-bounded LRU store of GET responses, one metadata and one body file per entry"""
+
+    def __init__(
+        self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._sizes: Optional[OrderedDict[str, int]] = None
+        self._total_bytes = 0
+
+    @staticmethod
+    def key(url: str, headers: Optional[dict[str, str]]) -> str:
+        # The Accept header changes the representation (raw README vs JSON), auth does not
+        accept = (headers or {}).get("Accept", "")
+        return hashlib.sha256(f"{url}\n{accept}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        """Build the LRU order from the files on disk, least recently used first"""
+        if self._sizes is not None:
+            return self._sizes
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    meta_path = os.path.join(root, name)
+                    try:
+                        body_size = os.path.getsize(
+                            meta_path[: -len(".json")] + ".body"
+                        )
+                        entries.append(
+                            (
+                                os.path.getmtime(meta_path),
+                                name[: -len(".json")],
+                                body_size + os.path.getsize(meta_path),
+                            )
+                        )
+                    except OSError:
+                        continue
+        self._sizes = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._total_bytes = sum(self._sizes.values())
+        return self._sizes
+
+    def get(self, url: str, headers: Optional[dict[str, str]]) -> Optional[CacheEntry]:
+        key = self.key(url, headers)
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            sizes = self._load_index()
+            if key not in sizes:
+                return None
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(body_path, "rb") as f:
+                    body = f.read()
+                os.utime(meta_path)
+            except (OSError, json.JSONDecodeError):
+                self._remove(key)
+                return None
+            sizes.move_to_end(key)
+        return CacheEntry(
+            url=meta["url"],
+            headers=meta["headers"],
+            stored_at=meta["stored_at"],
+            body=body,
+        )
+
+    def put(
+        self, url: str, headers: Optional[dict[str, str]], response: requests.Response
+    ) -> None:
+        stored_headers = {
+            name: response.headers[name]
+            for name in _STORED_HEADERS
+            if name in response.headers
+        }
+        self._write(self.key(url, headers), url, stored_headers, response.content)
+
+    def refresh(
+        self,
+        url: str,
+        headers: Optional[dict[str, str]],
+        entry: CacheEntry,
+        response: requests.Response,
+    ) -> None:
+        """Restart an entry's freshness lifetime after a 304, taking any new validators"""
+        stored_headers = dict(entry.headers)
+        for name in ("ETag", "Last-Modified"):
+            if name in response.headers:
+                stored_headers[name] = response.headers[name]
+        self._write(self.key(url, headers), url, stored_headers, entry.body)
+
+    def _write(self, key: str, url: str, headers: dict[str, str], body: bytes) -> None:
+        meta_path, body_path = self._paths(key)
+        meta = json.dumps({"url": url, "headers": headers, "stored_at": time.time()})
+        with self._lock:
+            sizes = self._load_index()
+            try:
+                os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+                body_tmp, meta_tmp = unique_tmp_path(body_path), unique_tmp_path(
+                    meta_path
+                )
+                with open(body_tmp, "wb") as f:
+                    f.write(body)
+                with open(meta_tmp, "w", encoding="utf-8") as f:
+                    f.write(meta)
+                os.replace(body_tmp, body_path)
+                os.replace(meta_tmp, meta_path)
+            except OSError:
+                return
+            self._total_bytes -= sizes.pop(key, 0)
+            sizes[key] = len(body) + len(meta.encode("utf-8"))
+            self._total_bytes += sizes[key]
+            self.stats.stores += 1
+            while self._total_bytes > self.max_bytes and len(sizes) > 1:
+                self._remove(next(iter(sizes)))
+                self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        if self._sizes is not None:
+            self._total_bytes -= self._sizes.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
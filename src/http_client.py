@@ -0,0 +1,511 @@
+"""
+Shared pooled HTTP client used by every fetcher
+"""
+
+import codecs
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from src.concurrency import host_slot
+from src.host_health import (
+    FAILURE_STATUSES,
+    HealthStats,
+    HostHealth,
+    HostUnavailableError,
+)
+from src.http_cache import CacheStats, HttpCache, cache_ttl
+from src.http_replay import record_response, replay_url
+from src.metrics import record_cache, record_request
+from src.rate_limit import (
+    GITHUB_API_HOSTS,
+    MAX_RATE_LIMITED_ATTEMPTS,
+    RateLimitStats,
+    TokenPool,
+    authorized_headers,
+    is_rate_limited,
+    rate_limit_resource,
+)
+
+# Connections kept alive per host; sized for the largest per-host concurrency cap
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 16
+
+# Transient upstream failures worth retrying for idempotent requests
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Failures that outlasted the retries, raised as HostUnavailableError on request
+TRANSIENT_ERRORS = (
+    requests.Timeout,
+    requests.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+# Streamed text bodies are read in chunks of this size and cut off at the maximum size
+STREAM_CHUNK_BYTES = 64 * 1024
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+
+@dataclass
+class HttpStats:
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    retries: int = 0
+
+
+_stats = HttpStats()
+_stats_lock = threading.Lock()
+
+
+def _count(field: str) -> None:
+    with _stats_lock:
+        setattr(_stats, field, getattr(_stats, field) + 1)
+
+
+class _CountingRetry(Retry):
+    """Retry policy that records every retry it grants"""
+
+    def increment(self, *args, **kwargs):
+        new_retry = super().increment(*args, **kwargs)
+        _count("retries")
+        return new_retry
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count("new_connections")
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count("new_connections")
+        super().connect()
+
+
+def _count_reuse(conn):
+    # A pooled connection that still holds an open socket skips the handshake
+    if getattr(conn, "sock", None) is not None:
+        _count("reused_connections")
+    return conn
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+    def _get_conn(self, timeout=None):
+        return _count_reuse(super()._get_conn(timeout))
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+    def _get_conn(self, timeout=None):
+        return _count_reuse(super()._get_conn(timeout))
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _build_session(respect_retry_after: bool = True) -> requests.Session:
+    """Pooled session retrying transient failures with backoff
+
+    With respect_retry_after, 413/429/503 answers carrying Retry-After are also
+    retried after sleeping as long as the header asks.
+    """
+    retry = _CountingRetry(
+        total=4,
+        connect=3,
+        read=2,
+        status=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        backoff_max=30,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+        respect_retry_after_header=respect_retry_after,
+    )
+    adapter = _CountingAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _build_session()
+# GitHub rate limits are waited out by the token pool, which can switch tokens;
+# urllib3 would sleep on the same token while holding the host slot
+_github_session = _build_session(respect_retry_after=False)
+_cache: HttpCache | None = None
+_token_pool = TokenPool.from_env()
+# Base URL of a replay server standing in for every upstream host (benchmarks)
+_replay_base: str | None = os.getenv("HTTP_REPLAY_URL") or None
+_record_dir: str | None = None
+_host_health = HostHealth()
+_max_body_bytes = DEFAULT_MAX_BODY_BYTES
+
+
+def enable_cache(cache: HttpCache | None) -> None:
+    """Serve cacheable GETs from (and store them in) cache; None turns caching off"""
+    global _cache  # pylint: disable=global-statement
+    _cache = cache
+
+
+def enable_replay(replay_base: str | None) -> None:
+    """Send every request to a replay server instead of the real host; None turns it off"""
+    global _replay_base  # pylint: disable=global-statement
+    _replay_base = replay_base
+
+
+def enable_recording(directory: str | None) -> None:
+    """Save every GET response as a replayable fixture under directory"""
+    global _record_dir  # pylint: disable=global-statement
+    _record_dir = directory
+
+
+def set_max_body_size(max_bytes: int) -> None:
+    """Cut streamed text bodies (READMEs, Coveralls pages) off after max_bytes"""
+    global _max_body_bytes  # pylint: disable=global-statement
+    _max_body_bytes = max_bytes
+
+
+@dataclass
+class TextBody:
+    status_code: int
+    text: str
+    # False if reading stopped early or at the size limit
+    complete: bool
+
+
+class _TextReader:
+    """Reads a streamed body chunk by chunk until done(text so far) or max_bytes
+
+    The bytes read replace the response content, so metrics, the cache and fixture
+    recording see what was actually downloaded.
+    """
+
+    def __init__(self, done: Optional[Callable[[str], bool]], max_bytes: int):
+        self.done = done
+        self.max_bytes = max_bytes
+        self.response: Optional[requests.Response] = None
+        self.text = ""
+        self.complete = True
+
+    def read(self, response: requests.Response) -> None:
+        self.response = response
+        self.text = ""
+        self.complete = True
+        if response.status_code != 200:
+            response.content  # pylint: disable=pointless-statement
+            return
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")
+        decoder = decoder("replace")
+        # Cached responses already hold their body
+        if response.raw is not None:
+            chunks = response.iter_content(STREAM_CHUNK_BYTES)
+        else:
+            content = response.content
+            chunks = (
+                content[i : i + STREAM_CHUNK_BYTES]
+                for i in range(0, len(content), STREAM_CHUNK_BYTES)
+            )
+        body: list[bytes] = []
+        parts: list[str] = []
+        size = 0
+        checked = 0
+        for chunk in chunks:
+            if size + len(chunk) > self.max_bytes:
+                chunk = chunk[: self.max_bytes - size]
+                self.complete = False
+            body.append(chunk)
+            size += len(chunk)
+            parts.append(decoder.decode(chunk, final=not self.complete))
+            if not self.complete:
+                break
+            # Pieces come in whatever sizes the server's chunks or gzip give, so check
+            # after every STREAM_CHUNK_BYTES read; bodies that end first are read whole
+            if self.done is not None and size - checked >= STREAM_CHUNK_BYTES:
+                checked = size
+                if self.done("".join(parts)):
+                    self.complete = False
+                    break
+        else:
+            parts.append(decoder.decode(b"", final=True))
+        if not self.complete:
+            response.close()
+        self.text = "".join(parts)
+        response._content = b"".join(body)  # pylint: disable=protected-access
+        response._content_consumed = True  # pylint: disable=protected-access
+
+
+def _record_metrics(
+    url: str, response: requests.Response, seconds: float, stream: bool = False
+) -> None:
+    # Streamed bodies are not read here; fall back to the advertised length
+    if stream:
+        size = int(response.headers.get("Content-Length") or 0)
+    else:
+        size = len(response.content)
+    record_request(urlparse(url).hostname or "", response.status_code, seconds, size)
+
+
+def _tracked(
+    url: str, timeout: float, send: Callable[[float], requests.Response]
+) -> requests.Response:
+    """Send with the host's adaptive timeout, feeding the outcome to its breaker
+
+    Raises HostUnavailableError without sending while the host's breaker is open.
+    """
+    host = urlparse(url).hostname or ""
+    timeout = _host_health.before_request(host, timeout)
+    start = time.perf_counter()
+    try:
+        response = send(timeout)
+    except Exception:
+        _host_health.record_failure(host)
+        raise
+    _host_health.record_response(
+        host, response.status_code, time.perf_counter() - start
+    )
+    return response
+
+
+def _session_for(url: str) -> requests.Session:
+    if urlparse(url).hostname in GITHUB_API_HOSTS:
+        return _github_session
+    return _session
+
+
+def _get(
+    url: str,
+    headers: dict[str, str] | None,
+    timeout: float,
+    reader: Optional[_TextReader] = None,
+    **kwargs,
+) -> requests.Response:
+    target = replay_url(_replay_base, url) if _replay_base else url
+    if reader is not None:
+        kwargs["stream"] = True
+    session = _session_for(url)
+    start = time.perf_counter()
+    response = _tracked(
+        url,
+        timeout,
+        lambda t: session.get(target, headers=headers, timeout=t, **kwargs),
+    )
+    if reader is not None:
+        reader.read(response)
+    streamed = kwargs.get("stream") and reader is None
+    _record_metrics(url, response, time.perf_counter() - start, streamed)
+    if _record_dir is not None and not streamed and (reader is None or reader.complete):
+        record_response(_record_dir, url, response)
+    return response
+
+
+def _send_github(
+    send: Callable[[dict[str, str]], requests.Response],
+    url: str,
+    headers: dict[str, str] | None,
+) -> requests.Response:
+    """Send a GitHub API request on a pooled token, waiting out rate limits"""
+    resource = rate_limit_resource(url)
+    for _ in range(MAX_RATE_LIMITED_ATTEMPTS):
+        token = _token_pool.acquire(resource)
+        _count("requests")
+        with host_slot(url):
+            response = send(authorized_headers(headers, token))
+        _token_pool.update(token, resource, response)
+        if not is_rate_limited(response):
+            break
+    return response
+
+
+def _send(
+    url: str,
+    headers: dict[str, str] | None,
+    timeout: float,
+    raise_unavailable: bool = False,
+    **kwargs,
+) -> requests.Response:
+    host = urlparse(url).hostname or ""
+    try:
+        if host in GITHUB_API_HOSTS:
+            response = _send_github(
+                lambda h: _get(url, h, timeout, **kwargs),
+                url,
+                headers,
+            )
+        else:
+            _count("requests")
+            with host_slot(url):
+                response = _get(url, headers, timeout, **kwargs)
+    except TRANSIENT_ERRORS as e:
+        if not raise_unavailable:
+            raise
+        raise HostUnavailableError(host, reason=type(e).__name__) from e
+    if raise_unavailable:
+        if response.status_code in FAILURE_STATUSES:
+            raise HostUnavailableError(host, reason=f"HTTP {response.status_code}")
+        if host in GITHUB_API_HOSTS and is_rate_limited(response):
+            # Still limited after MAX_RATE_LIMITED_ATTEMPTS tokens: retry on a later run
+            raise HostUnavailableError(host, reason="rate limited")
+    return response
+
+
+def http_get(
+    url: str,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30,
+    raise_unavailable: bool = False,
+    **kwargs,
+) -> requests.Response:
+    """GET a URL through the shared keep-alive session, retrying transient failures
+
+    When a cache is enabled, fresh entries are returned without touching the network
+    and stale ones are revalidated with If-None-Match / If-Modified-Since.
+
+    With raise_unavailable, a host that still fails after the retries (server errors,
+    timeouts, dropped connections, GitHub rate limits outlasting the token pool) raises
+    HostUnavailableError like an open breaker, so coverage lookups can tell
+    "unavailable" apart from "no coverage".
+    """
+    cache = _cache
+    ttl = cache_ttl(url) if cache is not None else None
+    if cache is None or ttl is None or kwargs.get("stream"):
+        return _send(url, headers, timeout, raise_unavailable, **kwargs)
+
+    entry = cache.get(url, headers)
+    host = urlparse(url).hostname or ""
+    if entry is not None and time.time() - entry.stored_at < ttl:
+        cache.count("hits")
+        record_cache(host, "hit")
+        return entry.to_response()
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        request_headers.update(entry.validators())
+    try:
+        response = _send(url, request_headers, timeout, raise_unavailable, **kwargs)
+    except HostUnavailableError:
+        if entry is None:
+            raise
+        # A stale answer beats none while the host is down
+        cache.count("hits")
+        record_cache(host, "stale")
+        return entry.to_response()
+
+    if response.status_code == 304 and entry is not None:
+        cache.count("revalidated")
+        record_cache(host, "revalidated")
+        cache.refresh(url, headers, entry, response)
+        return entry.to_response()
+
+    cache.count("misses")
+    record_cache(host, "miss")
+    reader = kwargs.get("reader")
+    if response.status_code == 200 and (reader is None or reader.complete):
+        cache.put(url, headers, response)
+    return response
+
+
+def http_get_text(
+    url: str,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30,
+    done: Optional[Callable[[str], bool]] = None,
+    max_bytes: Optional[int] = None,
+    raise_unavailable: bool = False,
+) -> TextBody:
+    """GET a text body chunk by chunk, stopping as soon as done(text so far) is true
+
+    At most max_bytes (by default the configured maximum body size) are downloaded.
+    Only bodies read to the end are cached; cached bodies are read the same way, so the
+    text does not depend on where it came from.
+    """
+    reader = _TextReader(done, max_bytes or _max_body_bytes)
+    response = http_get(
+        url,
+        headers=headers,
+        timeout=timeout,
+        raise_unavailable=raise_unavailable,
+        reader=reader,
+    )
+    if reader.response is not response:
+        # Served from the cache (fresh, revalidated or stale)
+        reader.read(response)
+    return TextBody(response.status_code, reader.text, reader.complete)
+
+
+def http_post(
+    url: str,
+    json: object,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30,
+) -> requests.Response:
+    """POST a JSON body through the shared session (never cached or retried)"""
+    target = replay_url(_replay_base, url) if _replay_base else url
+
+    def post(request_headers: dict[str, str] | None) -> requests.Response:
+        start = time.perf_counter()
+        response = _tracked(
+            url,
+            timeout,
+            lambda t: _session_for(url).post(
+                target, json=json, headers=request_headers, timeout=t
+            ),
+        )
+        _record_metrics(url, response, time.perf_counter() - start)
+        return response
+
+    if urlparse(url).hostname in GITHUB_API_HOSTS:
+        return _send_github(post, url, headers)
+    _count("requests")
+    with host_slot(url):
+        return post(headers)
+
+
+def get_http_stats() -> HttpStats:
+    """Return a snapshot of the connection and retry counters"""
+    with _stats_lock:
+        return HttpStats(**vars(_stats))
+
+
+def get_cache_stats() -> CacheStats | None:
+    """Return a snapshot of the response cache counters, if caching is enabled"""
+    if _cache is None:
+        return None
+    return CacheStats(**vars(_cache.stats))
+
+
+def get_host_health_stats() -> tuple[HealthStats, list[str]]:
+    """Return circuit breaker counters and the hosts whose breaker is currently open"""
+    return HealthStats(**vars(_host_health.stats)), _host_health.open_hosts()
+
+
+def get_rate_limit_stats() -> RateLimitStats:
+    """Return a snapshot of the GitHub rate-limit counters"""
+    return RateLimitStats(**vars(_token_pool.stats))
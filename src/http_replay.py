@@ -0,0 +1,83 @@
+"""
+Recorded HTTP fixtures: capture live responses and point the client at a replay server
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+import requests
+
+from src.json_state import save_json_state
+
+# Response headers worth replaying (content type, validators and rate-limit state)
+_RECORDED_HEADERS = (
+    "Content-Type",
+    "ETag",
+    "Last-Modified",
+    "Retry-After",
+    "X-RateLimit-Remaining",
+    "X-RateLimit-Reset",
+    "X-RateLimit-Resource",
+)
+
+
+@dataclass
+class Fixture:
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: str
+
+
+def fixture_path(directory: str, url: str) -> str:
+    """Where the response for url is stored: <directory>/<host>/<hash>.json"""
+    # Clients percent-encode differently, so the key is taken from the decoded URL
+    key = hashlib.sha256(unquote(url).encode("utf-8")).hexdigest()[:24]
+    return os.path.join(directory, urlparse(url).hostname or "unknown", f"{key}.json")
+
+
+def save_fixture(directory: str, fixture: Fixture) -> None:
+    path = fixture_path(directory, fixture.url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    save_json_state(path, vars(fixture), indent=None)
+
+
+def record_response(directory: str, url: str, response: requests.Response) -> None:
+    """Store a live response so it can be replayed later"""
+    save_fixture(
+        directory,
+        Fixture(
+            url=url,
+            status=response.status_code,
+            headers={
+                name: response.headers[name]
+                for name in _RECORDED_HEADERS
+                if name in response.headers
+            },
+            body=response.text,
+        ),
+    )
+
+
+def load_fixture(directory: str, url: str) -> Optional[Fixture]:
+    try:
+        with open(fixture_path(directory, url), "r", encoding="utf-8") as f:
+            return Fixture(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def replay_url(replay_base: str, url: str) -> str:
+    """https://host/path?query -> <replay_base>/host/path?query"""
+    parsed = urlparse(url)
+    rewritten = f"{replay_base.rstrip('/')}/{parsed.netloc}{parsed.path}"
+    return f"{rewritten}?{parsed.query}" if parsed.query else rewritten
+
+
+def original_url(path: str) -> str:
+    """Inverse of replay_url for the request path a replay server receives"""
+    return f"https://{path.lstrip('/')}"
@@ -0,0 +1,78 @@
+"""
+State kept in JSON files between runs: tolerant loading and atomic, periodic saving
+"""
+
+import json
+import os
+import socket
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+# Updates between saves, so an interrupted run loses little
+SAVE_EVERY = 25
+
+
+def unique_tmp_path(path: str) -> str:
+    """Temporary name next to path that no other thread, process or host shares
+
+    Workers on several machines may save into one shared directory (see src.leases).
+    """
+    host = socket.gethostname()
+    return f"{path}.{host}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def load_json_state(path: str, parse: Callable[[Any], T], default: T) -> T:
+    """parse(the JSON in path), or default if the file is missing or unreadable"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return parse(json.load(f))
+    except (ValueError, TypeError, IOError) as e:
+        print(f"⚠️  Ignoring unreadable {path}: {e}")
+        return default
+
+
+def save_json_state(path: str, data: Any, indent: int | None = 1) -> None:
+    """Replace path with data in one step, so readers never see a partial file"""
+    tmp_path = unique_tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+class JsonStateFile(ABC):
+    """Base for state saved to a JSON file every `save_every` updates and on save()
+
+    Subclasses guard their data with self._lock, call _updated() under it after each
+    change (saving outside the lock when it returns True) and implement _snapshot().
+    """
+
+    save_every = SAVE_EVERY
+    indent: int | None = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Saves run one at a time, so an older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+
+    @abstractmethod
+    def _snapshot(self) -> Any:
+        """JSON-serialisable copy of the state, taken while holding self._lock"""
+
+    def _updated(self) -> bool:
+        """Count one update (holding self._lock); True when a save is due"""
+        self._unsaved += 1
+        return self._unsaved >= self.save_every
+
+    def save(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                data = self._snapshot()
+                self._unsaved = 0
+            save_json_state(self.path, data, self.indent)
@@ -0,0 +1,150 @@
+"""
+Work claiming for several collector processes sharing a directory: shards and lease files
+"""
+
+import hashlib
+import json
+import os
+import socket
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+DEFAULT_LEASE_DIR = "leases"
+
+# A worker that has not finished a repo within this many seconds is presumed dead
+DEFAULT_LEASE_TTL = 15 * 60
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse "i/N" (1-based) into (i, N)"""
+    index, _, count = value.partition("/")
+    shard = (int(index), int(count))
+    if not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"shard {value} is not of the form i/N with 1 <= i <= N")
+    return shard
+
+
+def in_shard(repo_name: str, shard: tuple[int, int]) -> bool:
+    """Stable partition of repos by name, identical on every machine"""
+    index, count = shard
+    digest = hashlib.sha1(repo_name.lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+@dataclass
+class Lease:
+    repo: str
+    worker: str
+    expires_at: float
+    done: bool = False
+    # When the lease was first claimed; kept once done so refreshes can tell old work
+    claimed_at: float = 0.0
+
+
+class LeaseDir:
+    """One lease file per repo; linking a fully written lease into place is the claim
+
+    Expired leases are taken over by renaming the old file away first. The renamed file
+    is checked to still be the expired lease; if a faster worker had already replaced
+    it, that worker's lease is put back and the takeover abandoned, so two workers
+    never both win the same repo.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_LEASE_DIR,
+        worker_id: Optional[str] = None,
+        ttl: float = DEFAULT_LEASE_TTL,
+    ):
+        self.directory = directory
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, repo_name: str) -> str:
+        key = hashlib.sha1(repo_name.lower().encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.lease")
+
+    def _read(self, path: str) -> Optional[Lease]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return Lease(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError, OSError):
+            # Leases only appear fully written, so this one is corrupt: treat as expired
+            return Lease(repo="", worker="", expires_at=0)
+
+    def _create(self, path: str, lease: Lease) -> bool:
+        """Write lease aside and link it into place, which fails if path exists"""
+        tmp_path = f"{path}.{self.worker_id}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(lease), f)
+        try:
+            os.link(tmp_path, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def claim(self, repo_name: str, done_before: Optional[float] = None) -> bool:
+        """Try to take repo for this worker; False if it is done or leased elsewhere
+
+        With done_before (a Unix time), a done lease claimed before then counts as
+        spent and is taken over: refreshes re-extract repos finished in earlier runs.
+        """
+        path = self._path(repo_name)
+        now = time.time()
+        lease = Lease(repo_name, self.worker_id, now + self.ttl, claimed_at=now)
+        if self._create(path, lease):
+            return True
+
+        current = self._read(path)
+        if current is None:
+            # Released between our create and read; try once more
+            return self._create(path, lease)
+        if current.done:
+            if done_before is None or current.claimed_at >= done_before:
+                return False
+        elif current.expires_at > now:
+            return False
+
+        stale_path = f"{path}.{self.worker_id}.stale"
+        try:
+            os.rename(path, stale_path)
+        except FileNotFoundError:
+            return False  # another worker took it over first
+        if self._read(stale_path) != current:
+            # Another worker took it over between our read and rename, and we moved
+            # its fresh lease aside: put it back unless someone claimed the repo since
+            try:
+                os.link(stale_path, path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        if not current.done:
+            print(
+                f"🔓 Took over expired lease on {repo_name} from {current.worker or '?'}"
+            )
+        return self._create(path, lease)
+
+    def complete(self, repo_name: str) -> None:
+        """Mark repo done so no worker claims it again (until a later refresh)"""
+        path = self._path(repo_name)
+        current = self._read(path)
+        claimed_at = time.time()
+        if current is not None and current.worker == self.worker_id:
+            claimed_at = current.claimed_at or claimed_at
+        done = Lease(repo_name, self.worker_id, 0, done=True, claimed_at=claimed_at)
+        tmp_path = f"{path}.{self.worker_id}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(done), f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,219 @@
+"""
+Exact lines of code from the repository tarball, streamed and counted without touching disk
+"""
+
+import multiprocessing
+import os
+import re
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any, Optional
+
+from src.http_client import http_get
+from src.json_state import JsonStateFile, load_json_state
+from src.metrics import timed
+from src.models import RepoInfo
+
+DEFAULT_CACHE_FILE = "line_counts.json"
+
+# Decompressed bytes read from one archive member at a time
+CHUNK_SIZE = 64 * 1024
+
+# Vendored, generated, data and prose paths, matched against the path inside the repo
+DEFAULT_EXCLUDES = re.compile(
+    r"(^|/)(vendor|vendors|node_modules|bower_components|third_party|thirdparty"
+    r"|external|dist|build|Pods|\.git)/"
+    r"|\.min\.(js|css)$"
+    r"|(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|Cargo\.lock|poetry\.lock"
+    r"|Gemfile\.lock|composer\.lock|go\.sum)$"
+    r"|_pb2(_grpc)?\.py$|\.pb\.(go|cc|h)$|\.generated\.\w+$"
+    r"|\.(json|csv|tsv|xml|svg|map|lock|txt|md|rst|ipynb)$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class LineCounts:
+    by_extension: dict[str, int] = field(default_factory=dict)
+    files: int = 0
+    excluded_files: int = 0
+    binary_files: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_extension.values())
+
+
+def _extension(path: str) -> str:
+    name = path.rsplit("/", 1)[-1]
+    _, dot, ext = name.rpartition(".")
+    return ext.lower() if dot and _ else name
+
+
+def _count_member(f: IO[bytes]) -> Optional[int]:
+    """Count lines of one archive member; None if it looks binary"""
+    lines = 0
+    last = b"\n"
+    first = True
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if first and b"\0" in chunk:
+            return None
+        first = False
+        lines += chunk.count(b"\n")
+        last = chunk[-1:]
+    # A final line without a trailing newline still counts
+    return lines + (last != b"\n")
+
+
+def count_tarball_lines(
+    fileobj: IO[bytes], excludes: re.Pattern = DEFAULT_EXCLUDES
+) -> LineCounts:
+    """Count lines per file extension in a gzipped tarball read front to back
+
+    The archive is decompressed incrementally ("r|gz"), so memory use does not grow
+    with its size and any non-seekable stream (an HTTP body, a pipe) works. GitHub
+    tarballs wrap everything in one top-level directory, which is stripped before
+    matching `excludes`.
+    """
+    counts = LineCounts()
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            path = member.name.split("/", 1)[1] if "/" in member.name else member.name
+            if excludes.search(path):
+                counts.excluded_files += 1
+                continue
+            f = archive.extractfile(member)
+            if f is None:
+                continue
+            lines = _count_member(f)
+            if lines is None:
+                counts.binary_files += 1
+                continue
+            counts.files += 1
+            ext = _extension(path)
+            counts.by_extension[ext] = counts.by_extension.get(ext, 0) + lines
+    return counts
+
+
+def count_tarball_file(path: str) -> LineCounts:
+    """Count lines in a local .tar.gz file"""
+    with open(path, "rb") as f:
+        return count_tarball_lines(f)
+
+
+def resolve_head_sha(repo: RepoInfo) -> Optional[str]:
+    """SHA of the default branch head (a cheap, revalidated request)"""
+    response = http_get(
+        f"https://api.github.com/repos/{repo.owner}/{repo.name}/commits/HEAD",
+        headers={"Accept": "application/vnd.github.sha"},
+        timeout=30,
+    )
+    if response.status_code != 200:
+        return None
+    return response.text.strip() or None
+
+
+def _count_remote(owner: str, name: str, sha: str) -> Optional[LineCounts]:
+    """Download and count a repo tarball (runs in a pool process)"""
+    response = http_get(
+        f"https://api.github.com/repos/{owner}/{name}/tarball/{sha}",
+        timeout=60,
+        stream=True,
+    )
+    try:
+        if response.status_code != 200:
+            return None
+        # The body is the gzip archive itself; let tarfile do the decompression
+        response.raw.decode_content = False
+        return count_tarball_lines(response.raw)
+    finally:
+        response.close()
+
+
+class LineCountCache(JsonStateFile):
+    """Line counts by repo and commit SHA, kept between runs"""
+
+    # Every count took a whole tarball download; none is worth losing
+    save_every = 1
+    indent = None
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE):
+        super().__init__(path)
+        self._counts: dict[str, LineCounts] = load_json_state(
+            path,
+            lambda data: {key: LineCounts(**counts) for key, counts in data.items()},
+            {},
+        )
+
+    def get(self, repo_name: str, sha: str) -> Optional[LineCounts]:
+        with self._lock:
+            return self._counts.get(f"{repo_name}@{sha}")
+
+    def put(self, repo_name: str, sha: str, counts: LineCounts) -> None:
+        with self._lock:
+            self._counts[f"{repo_name}@{sha}"] = counts
+            due = self._updated()
+        if due:
+            self.save()
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {key: asdict(c) for key, c in self._counts.items()}
+
+
+class ExactLineCounter:
+    """Counts repos in a process pool, so several large tarballs decompress in parallel"""
+
+    def __init__(
+        self, processes: Optional[int] = None, cache_path: str = DEFAULT_CACHE_FILE
+    ):
+        self.cache = LineCountCache(cache_path)
+        # Spawned rather than forked: the parent already runs HTTP and worker threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=processes or min(4, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def count(self, repo: RepoInfo) -> Optional[LineCounts]:
+        sha = resolve_head_sha(repo)
+        if sha is None:
+            return None
+        repo_name = f"{repo.owner}/{repo.name}"
+        counts = self.cache.get(repo_name, sha)
+        if counts is None:
+            counts = self._pool.submit(
+                _count_remote, repo.owner, repo.name, sha
+            ).result()
+            if counts is None:
+                return None
+            self.cache.put(repo_name, sha, counts)
+        return counts
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+
+_counter: Optional[ExactLineCounter] = None
+
+
+def enable_exact_line_count(counter: Optional[ExactLineCounter]) -> None:
+    global _counter  # pylint: disable=global-statement
+    _counter = counter
+
+
+@timed("line_count")
+def count_repo_lines(repo: RepoInfo) -> Optional[int]:
+    """Exact line count of repo when exact counting is enabled, otherwise None"""
+    counter = _counter
+    if counter is None:
+        return None
+    try:
+        counts = counter.count(repo)
+    except Exception:
+        return None
+    return counts.total if counts is not None else None
@@ -0,0 +1,272 @@
+"""
+Per-stage timings and per-host HTTP latency histograms, exportable as JSON or Prometheus text
+"""
+
+import cProfile
+import json
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_PREFIX = "coverage_collector"
+
+
+@dataclass
+class Histogram:
+    counts: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, seconds: float) -> None:
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(BUCKETS, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "mean_seconds": round(self.total / self.count, 4) if self.count else None,
+            "p50_seconds": self.quantile(0.5),
+            "p90_seconds": self.quantile(0.9),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], self.counts)),
+        }
+
+
+@dataclass
+class HostMetrics:
+    latency: Histogram = field(default_factory=Histogram)
+    bytes: int = 0
+    statuses: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    cache: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+_hosts: dict[str, HostMetrics] = defaultdict(HostMetrics)
+_stages: dict[str, Histogram] = defaultdict(Histogram)
+_lock = threading.Lock()
+
+_profiler: Optional[cProfile.Profile] = None
+_profiler_lock = threading.Lock()
+
+_EXHAUSTED: Any = object()
+
+
+def record_request(host: str, status: int, seconds: float, size: int) -> None:
+    """Record one request that went over the network"""
+    with _lock:
+        metrics = _hosts[host]
+        metrics.latency.observe(seconds)
+        metrics.bytes += size
+        metrics.statuses[str(status)] += 1
+
+
+def record_cache(host: str, outcome: str) -> None:
+    """Record how the response cache handled a request: hit, revalidated or miss"""
+    with _lock:
+        _hosts[host].cache[outcome] += 1
+
+
+def record_stage(name: str, seconds: float) -> None:
+    with _lock:
+        _stages[name].observe(seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as one observation of a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator recording each call of the function as a stage observation"""
+
+    def decorate(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def enable_cpu_profile() -> None:
+    """Collect a cProfile of the CPU-bound stages wrapped in profiled()"""
+    global _profiler  # pylint: disable=global-statement
+    _profiler = cProfile.Profile()
+
+
+@contextmanager
+def profiled(name: str):
+    """Time a CPU-bound stage, also profiling it when a CPU profile is enabled
+
+    cProfile supports one active profiler at a time, so while profiling these
+    stages run one at a time across threads.
+    """
+    profiler = _profiler
+    if profiler is None:
+        with stage(name):
+            yield
+        return
+    with _profiler_lock, stage(name):
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+
+def profiled_iter(name: str, items: Iterator[T]) -> Iterator[T]:
+    """Yield from a lazy CPU-bound iterator, timing only the work done inside it"""
+    while True:
+        with profiled(name):
+            item = next(items, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+        yield item  # type: ignore[misc]
+
+
+def snapshot() -> dict[str, Any]:
+    """All collected metrics as plain JSON-serialisable data"""
+    with _lock:
+        return {
+            "stages": {name: h.summary() for name, h in sorted(_stages.items())},
+            "hosts": {
+                host: {
+                    "latency": m.latency.summary(),
+                    "bytes": m.bytes,
+                    "statuses": dict(m.statuses),
+                    "cache": dict(m.cache),
+                }
+                for host, m in sorted(_hosts.items())
+            },
+        }
+
+
+def _histogram_lines(name: str, label: str, value: str, h: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip([*map(str, BUCKETS), "+Inf"], h.counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{{{label}="{value}"}} {h.total:.6f}')
+    lines.append(f'{name}_count{{{label}="{value}"}} {h.count}')
+    return lines
+
+
+def to_prometheus() -> str:
+    """Metrics in the Prometheus text exposition format (for the node_exporter textfile collector)"""
+    stage_metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+    request_metric = f"{METRIC_PREFIX}_http_request_duration_seconds"
+    lines = [
+        f"# HELP {stage_metric} Time spent in each pipeline stage.",
+        f"# TYPE {stage_metric} histogram",
+    ]
+    with _lock:
+        for name, h in sorted(_stages.items()):
+            lines.extend(_histogram_lines(stage_metric, "stage", name, h))
+        lines.append(f"# HELP {request_metric} Network latency of HTTP requests.")
+        lines.append(f"# TYPE {request_metric} histogram")
+        for host, m in sorted(_hosts.items()):
+            lines.extend(_histogram_lines(request_metric, "host", host, m.latency))
+        lines.append(f"# TYPE {METRIC_PREFIX}_http_response_bytes_total counter")
+        for host, m in sorted(_hosts.items()):
+            lines.append(
+                f'{METRIC_PREFIX}_http_response_bytes_total{{host="{host}"}} {m.bytes}'
+            )
+        lines.append(f"# TYPE {METRIC_PREFIX}_http_responses_total counter")
+        for host, m in sorted(_hosts.items()):
+            for status, count in sorted(m.statuses.items()):
+                lines.append(
+                    f'{METRIC_PREFIX}_http_responses_total{{host="{host}",status="{status}"}} {count}'
+                )
+        lines.append(f"# TYPE {METRIC_PREFIX}_http_cache_total counter")
+        for host, m in sorted(_hosts.items()):
+            for outcome, count in sorted(m.cache.items()):
+                lines.append(
+                    f'{METRIC_PREFIX}_http_cache_total{{host="{host}",outcome="{outcome}"}} {count}'
+                )
+    return "\n".join(lines) + "\n"
+
+
+def write_profile(path: str) -> None:
+    """Write the metrics to path: Prometheus text for .prom files, JSON otherwise"""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".prom"):
+            f.write(to_prometheus())
+        else:
+            json.dump(snapshot(), f, indent=2)
+
+
+def write_cpu_profile(path: str) -> bool:
+    """Dump the collected cProfile stats (pstats format); False if none were collected"""
+    if _profiler is None:
+        return False
+    with _profiler_lock:
+        try:
+            pstats.Stats(_profiler).dump_stats(path)
+        except TypeError:
+            # No profiled stage ran, so there is nothing to dump
+            return False
+    return True
+
+
+def print_stage_summary() -> None:
+    """One line per stage and per host, slowest total first"""
+    data = snapshot()
+    print("\n⏱️  Stages:")
+    for name, s in sorted(
+        data["stages"].items(), key=lambda kv: kv[1]["total_seconds"], reverse=True
+    ):
+        print(
+            f"  {name:<18} {s['count']:>6} × mean {s['mean_seconds'] * 1000:>8.1f} ms, "
+            f"total {s['total_seconds']:>8.2f}s"
+        )
+    print("🌐 Hosts:")
+    for host, h in data["hosts"].items():
+        latency = h["latency"]
+        if latency["count"]:
+            timing = (
+                f"mean {latency['mean_seconds'] * 1000:.0f} ms, "
+                f"p90 ≤ {latency['p90_seconds']}s"
+            )
+        else:
+            timing = "no network requests"
+        print(
+            f"  {host:<18} {latency['count']:>6} requests, {timing}, "
+            f"{h['bytes'] / 1024:,.0f} KiB, cache {h['cache'] or '-'}"
+        )
@@ -1,8 +1,11 @@
+import sys
 from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+# Slotted, with the few distinct language and source strings interned: a crawl can
+# hold millions of these at once
+@dataclass(slots=True)
 class RepoInfo:
     owner: str
     name: str
@@ -10,8 +13,11 @@ class RepoInfo:
     language: str
     clone_url: str
 
+    def __post_init__(self):
+        self.language = sys.intern(self.language)
 
-@dataclass
+
+@dataclass(slots=True)
 class CoverageResult:
     repo: RepoInfo
     url: str
@@ -20,3 +26,7 @@ class CoverageResult:
     source: Optional[str]
     error: Optional[str]
     timestamp: str
+
+    def __post_init__(self):
+        if self.source is not None:
+            self.source = sys.intern(self.source)
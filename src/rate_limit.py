@@ -0,0 +1,182 @@
+"""
+GitHub rate-limit budgets tracked per token and resource, shared by every request
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+GITHUB_API_HOSTS = {"api.github.com"}
+
+# Give up on one request after this many rate-limited answers in a row
+MAX_RATE_LIMITED_ATTEMPTS = 10
+
+# Pause used when a limit is hit without Retry-After or X-RateLimit-Reset to go by
+DEFAULT_PAUSE = 60.0
+
+
+def rate_limit_resource(url: str) -> str:
+    """The GitHub budget a request draws on: search, graphql or core"""
+    path = urlparse(url).path
+    if path.startswith("/search/"):
+        return "search"
+    if path == "/graphql":
+        return "graphql"
+    return "core"
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    """True for primary (remaining 0) and secondary (Retry-After) rate-limit answers"""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (
+        response.headers.get("X-RateLimit-Remaining") == "0"
+        or "Retry-After" in response.headers
+    )
+
+
+def authorized_headers(
+    headers: Optional[dict[str, str]], token: Optional[str]
+) -> dict[str, str]:
+    """Copy of headers carrying token, unless the caller already set one"""
+    authorized = dict(headers or {})
+    if token and "Authorization" not in authorized:
+        authorized["Authorization"] = f"token {token}"
+    return authorized
+
+
+@dataclass
+class Budget:
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+    blocked_until: float = 0.0
+    uses: int = 0
+
+
+@dataclass
+class RateLimitStats:
+    rate_limited: int = 0
+    pauses: int = 0
+    paused_seconds: float = 0.0
+
+
+class TokenPool:
+    """Hands out the token with the most budget left, pausing when every token is spent
+
+    Budgets start unknown and are learnt from X-RateLimit-* headers; each handout
+    reserves one request so concurrent workers do not all spend the last few.
+    """
+
+    def __init__(self, tokens: list[Optional[str]]):
+        self.tokens = tokens or [None]
+        self.stats = RateLimitStats()
+        self._budgets: dict[tuple[Optional[str], str], Budget] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TokenPool":
+        """Tokens from GITHUB_TOKENS=a,b,c, else GITHUB_TOKEN, else anonymous"""
+        tokens = [
+            token.strip()
+            for token in os.getenv("GITHUB_TOKENS", "").split(",")
+            if token.strip()
+        ]
+        if not tokens and os.getenv("GITHUB_TOKEN"):
+            tokens = [os.environ["GITHUB_TOKEN"]]
+        return cls(tokens or [None])
+
+    def _budget(self, token: Optional[str], resource: str) -> Budget:
+        return self._budgets.setdefault((token, resource), Budget())
+
+    def _available_at(self, budget: Budget, now: float) -> float:
+        """When a budget can next be spent (now or earlier if it is usable)"""
+        if budget.blocked_until > now:
+            return budget.blocked_until
+        if budget.remaining is not None and budget.remaining <= 0:
+            return budget.reset_at if budget.reset_at > now else now
+        return now
+
+    @staticmethod
+    def _priority(budget: Budget) -> tuple[float, int]:
+        # Most requests left first (unknown counts as plenty), then the least used
+        remaining = budget.remaining if budget.remaining is not None else float("inf")
+        return remaining, -budget.uses
+
+    def acquire(self, resource: str) -> Optional[str]:
+        """Reserve one request on the best token, sleeping until a budget frees up"""
+        while True:
+            with self._lock:
+                now = time.time()
+                for token in self.tokens:
+                    budget = self._budget(token, resource)
+                    if budget.reset_at and budget.reset_at <= now:
+                        # The window rolled over; headers will tell us the new budget
+                        budget.remaining = None
+                        budget.reset_at = 0.0
+                usable = [
+                    token
+                    for token in self.tokens
+                    if self._available_at(self._budget(token, resource), now) <= now
+                ]
+                if usable:
+                    token = max(
+                        usable, key=lambda t: self._priority(self._budget(t, resource))
+                    )
+                    budget = self._budget(token, resource)
+                    budget.uses += 1
+                    if budget.remaining is not None:
+                        budget.remaining -= 1
+                    return token
+                wake_at = min(
+                    self._available_at(self._budget(token, resource), now)
+                    for token in self.tokens
+                )
+                pause = max(1.0, wake_at - now)
+                self.stats.pauses += 1
+                self.stats.paused_seconds += pause
+            print(
+                f"⏳ GitHub {resource} budget spent on all {len(self.tokens)} "
+                f"token(s); pausing {pause:.0f}s until it resets"
+            )
+            time.sleep(pause)
+
+    def update(
+        self, token: Optional[str], resource: str, response: requests.Response
+    ) -> None:
+        """Record the budget GitHub reported, and any pause it asked for"""
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self._lock:
+            budget = self._budget(token, resource)
+            try:
+                if "X-RateLimit-Remaining" in headers:
+                    budget.remaining = int(headers["X-RateLimit-Remaining"])
+                if "X-RateLimit-Reset" in headers:
+                    budget.reset_at = float(headers["X-RateLimit-Reset"])
+            except ValueError:
+                pass
+            if not is_rate_limited(response):
+                return
+            self.stats.rate_limited += 1
+            now = time.time()
+            try:
+                retry_after = float(headers["Retry-After"])
+            except (KeyError, ValueError):
+                retry_after = None
+            if retry_after is not None:
+                budget.blocked_until = now + retry_after
+            elif budget.reset_at > now:
+                budget.remaining = 0
+            else:
+                budget.blocked_until = now + DEFAULT_PAUSE
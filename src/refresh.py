@@ -0,0 +1,220 @@
+"""
+Incremental refresh: re-extract only repos that changed since their last coverage check
+"""
+
+import heapq
+import sys
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from src.concurrency import process_in_order
+from src.host_health import is_unavailable_record
+from src.http_client import http_get
+from src.json_state import JsonStateFile, load_json_state
+from src.models import RepoInfo
+
+DEFAULT_STATE_FILE = "refresh_state.json"
+
+
+@dataclass
+class RepoState:
+    checked_at: str
+    pushed_at: Optional[str] = None
+    readme_etag: Optional[str] = None
+
+
+@dataclass
+class RepoCheck:
+    repo: RepoInfo
+    changed: bool
+    reason: str
+    pushed_at: Optional[str] = None
+    readme_etag: Optional[str] = None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse GitHub (Z-suffixed) and stored (naive local) ISO timestamps as UTC"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc)
+
+
+class RefreshState(JsonStateFile):
+    """Per-repo check times, push dates and README ETags kept between refresh runs"""
+
+    def __init__(self, path: str = DEFAULT_STATE_FILE):
+        super().__init__(path)
+        self._repos: dict[str, RepoState] = load_json_state(
+            path,
+            lambda data: {repo: RepoState(**state) for repo, state in data.items()},
+            {},
+        )
+
+    def get(self, repo: str) -> Optional[RepoState]:
+        with self._lock:
+            return self._repos.get(repo)
+
+    def last_checked(self, repo: str) -> Optional[float]:
+        """Unix time repo was last checked or extracted, if known"""
+        state = self.get(repo)
+        checked = _parse_time(state.checked_at) if state else None
+        return checked.timestamp() if checked else None
+
+    def update(self, repo: str, **fields: Any) -> None:
+        with self._lock:
+            state = self._repos.get(repo) or RepoState(checked_at="")
+            for name, value in fields.items():
+                if value is not None:
+                    setattr(state, name, value)
+            self._repos[repo] = state
+            due = self._updated()
+        if due:
+            self.save()
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {repo: asdict(state) for repo, state in self._repos.items()}
+
+
+def latest_records(records: Iterable[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """The most recent record of every repo"""
+    latest: dict[str, dict[str, Any]] = {}
+    for record in records:
+        repo = record.get("repo")
+        if not repo or "/" not in repo:
+            continue
+        if repo not in latest or record["timestamp"] > latest[repo]["timestamp"]:
+            latest[repo] = record
+    return latest
+
+
+def refresh_queue(
+    latest: dict[str, dict[str, Any]], state: RefreshState
+) -> list[tuple[int, str, str]]:
+    """Heap of (priority, last checked, repo): known pushes and repos whose sources
+    were unavailable first, then the stalest"""
+    heap = []
+    for repo, record in latest.items():
+        repo_state = state.get(repo)
+        checked_at = record["timestamp"]
+        if repo_state and repo_state.checked_at > checked_at:
+            checked_at = repo_state.checked_at
+        last_check = _parse_time(checked_at)
+        pushed = _parse_time(repo_state.pushed_at) if repo_state else None
+        # A push seen after the last check means the stored coverage is out of date
+        known_changed = bool(pushed and last_check and pushed > last_check)
+        retry = is_unavailable_record(record)
+        heap.append((0 if known_changed or retry else 1, checked_at, repo))
+    heapq.heapify(heap)
+    return heap
+
+
+def check_repo(
+    repo: RepoInfo, state: Optional[RepoState], last_check: str
+) -> RepoCheck:
+    """Decide cheaply whether repo changed since last_check
+
+    The push date from /repos/{owner}/{name} (revalidated through the HTTP cache)
+    decides; if it is unavailable, a changed README ETag does.
+    """
+    response = http_get(
+        f"https://api.github.com/repos/{repo.owner}/{repo.name}", timeout=30
+    )
+    if response.status_code == 200:
+        data = response.json()
+        repo.stars = data.get("stargazers_count", repo.stars)
+        repo.language = sys.intern(data.get("language") or repo.language)
+        pushed_at = data.get("pushed_at")
+        pushed = _parse_time(pushed_at)
+        checked = _parse_time(last_check)
+        if pushed and checked and pushed <= checked:
+            return RepoCheck(repo, False, "no pushes since last check", pushed_at)
+        return RepoCheck(repo, True, f"pushed {pushed_at}", pushed_at)
+
+    readme = http_get(
+        f"https://api.github.com/repos/{repo.owner}/{repo.name}/readme",
+        headers={"Accept": "application/vnd.github.v3.raw"},
+        timeout=30,
+    )
+    etag = readme.headers.get("ETag") if readme.status_code == 200 else None
+    if etag and state and state.readme_etag == etag:
+        return RepoCheck(repo, False, "README unchanged", readme_etag=etag)
+    return RepoCheck(repo, True, "README changed", readme_etag=etag)
+
+
+def _repo_info(record: dict[str, Any]) -> RepoInfo:
+    owner, name = record["repo"].split("/", 1)
+    return RepoInfo(
+        owner=owner,
+        name=name,
+        stars=record.get("stars") or 0,
+        language=record.get("language") or "Unknown",
+        clone_url=f"https://github.com/{record['repo']}.git",
+    )
+
+
+def iter_changed_repos(
+    records: Iterable[dict[str, Any]],
+    state: RefreshState,
+    workers: int = 1,
+    skip: Optional[Callable[[str], bool]] = None,
+) -> Iterator[RepoInfo]:
+    """Yield stored repos that changed since their last check, highest priority first
+
+    Unchanged repos only have their check time moved forward. Repos for which `skip`
+    returns True are not checked at all. Checks run on up to `workers` threads and
+    stop as soon as the caller stops asking for repos.
+    """
+    latest = latest_records(records)
+    heap = refresh_queue(latest, state)
+    print(f"🔁 {len(heap)} repositories queued for refresh")
+
+    def candidates() -> Iterator[tuple[RepoInfo, Optional[RepoState], str]]:
+        while heap:
+            _, last_check, repo = heapq.heappop(heap)
+            if skip is not None and skip(repo):
+                continue
+            yield _repo_info(latest[repo]), state.get(repo), last_check
+
+    def check(candidate: tuple[RepoInfo, Optional[RepoState], str]) -> RepoCheck:
+        repo, repo_state, last_check = candidate
+        if is_unavailable_record(latest[f"{repo.owner}/{repo.name}"]):
+            return RepoCheck(repo, True, "coverage sources were unavailable last time")
+        try:
+            return check_repo(repo, repo_state, last_check)
+        except Exception as e:
+            return RepoCheck(repo, True, f"check failed ({e})")
+
+    unchanged = 0
+    try:
+        for candidate, result, output in process_in_order(candidates(), check, workers):
+            print(output, end="")
+            repo_name = f"{result.repo.owner}/{result.repo.name}"
+            # The last check may only be known from the stored result; keep it for
+            # RefreshState.last_checked
+            state.update(
+                repo_name,
+                checked_at=candidate[2],
+                pushed_at=result.pushed_at,
+                readme_etag=result.readme_etag,
+            )
+            if result.changed:
+                print(f"♻️  {repo_name} changed ({result.reason})")
+                yield result.repo
+            else:
+                unchanged += 1
+                state.update(repo_name, checked_at=datetime.now().isoformat())
+    finally:
+        print(f"💤 {unchanged} repositories unchanged since their last check")
+        state.save()
+
+
+def mark_refreshed(state: RefreshState, repo: RepoInfo, timestamp: str) -> None:
+    """Record that repo's coverage was re-extracted at timestamp"""
+    state.update(f"{repo.owner}/{repo.name}", checked_at=timestamp)
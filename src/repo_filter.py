@@ -0,0 +1,158 @@
+"""
+Avoiding requests for repos unlikely to report coverage: a search-payload pre-filter and
+a negative cache that re-checks coverage-less repos with exponential backoff
+"""
+
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+from src.json_state import JsonStateFile, load_json_state
+from src.models import CoverageResult
+
+DEFAULT_NEGATIVE_CACHE_FILE = "negative_cache.json"
+
+# First re-check one week after a miss, doubling up to half a year
+BASE_BACKOFF = 7 * 24 * 3600
+MAX_BACKOFF = 180 * 24 * 3600
+
+# Requests an extraction typically makes (languages, README, then a badge or Coveralls)
+REQUESTS_PER_REPO = 3
+
+# Repos smaller than this (KB, as reported by search) have too little code to test
+MIN_REPO_SIZE_KB = 50
+
+NON_CODE_TOPICS = {
+    "awesome",
+    "awesome-list",
+    "awesome-lists",
+    "list",
+    "lists",
+    "resources",
+    "books",
+    "free-programming-books",
+    "tutorial",
+    "tutorials",
+    "interview",
+    "interview-questions",
+    "interview-practice",
+    "roadmap",
+    "roadmaps",
+    "cheatsheet",
+    "cheatsheets",
+    "style-guide",
+    "styleguide",
+    "education",
+    "course",
+    "prompts",
+    "hacktoberfest-list",
+}
+
+NON_CODE_DESCRIPTION = re.compile(
+    r"\b(curated list|awesome list|a list of|collection of (awesome|useful|free)"
+    r"|interview (questions|preparation|guide|handbook)|roadmaps?\b|cheat ?sheets?"
+    r"|style guide|study notes|learning path|free (programming )?books)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class FilterStats:
+    prefiltered: int = 0
+    negative_skipped: int = 0
+
+    @property
+    def requests_saved(self) -> int:
+        return (self.prefiltered + self.negative_skipped) * REQUESTS_PER_REPO
+
+
+_stats = FilterStats()
+_stats_lock = threading.Lock()
+
+
+def get_filter_stats() -> FilterStats:
+    return _stats
+
+
+def non_code_reason(item: dict) -> Optional[str]:
+    """Why a search API item is likely documentation or a list rather than code
+
+    Only fields already in the search payload are used, so no request is spent on
+    repos dropped here.
+    """
+    if item.get("archived"):
+        return "archived"
+    topics = NON_CODE_TOPICS.intersection(item.get("topics") or ())
+    if topics:
+        return f"topic '{sorted(topics)[0]}'"
+    if item["name"].lower().startswith("awesome"):
+        return "awesome list"
+    match = NON_CODE_DESCRIPTION.search(item.get("description") or "")
+    if match:
+        return f"description mentions '{match.group(0)}'"
+    size = item.get("size")
+    if (
+        size is not None
+        and size < MIN_REPO_SIZE_KB
+        and not item.get("has_issues", True)
+    ):
+        return "tiny repo without issues"
+    return None
+
+
+def count_prefiltered() -> None:
+    with _stats_lock:
+        _stats.prefiltered += 1
+
+
+@dataclass
+class NegativeEntry:
+    misses: int
+    next_check: float
+
+
+class NegativeCache(JsonStateFile):
+    """Repos that had no coverage data, skipped by --refresh until their next re-check is due"""
+
+    def __init__(self, path: str = DEFAULT_NEGATIVE_CACHE_FILE):
+        super().__init__(path)
+        self._entries: dict[str, NegativeEntry] = load_json_state(
+            path,
+            lambda data: {repo: NegativeEntry(**entry) for repo, entry in data.items()},
+            {},
+        )
+
+    def should_skip(self, repo_name: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(repo_name)
+            skip = entry is not None and entry.next_check > time.time()
+        if skip:
+            with _stats_lock:
+                _stats.negative_skipped += 1
+        return skip
+
+    def record(self, result: CoverageResult) -> None:
+        """Back off further on another definite miss; forget the repo once it has coverage
+
+        Timeouts and other transient errors say nothing about the repo and are ignored.
+        """
+        repo_name = f"{result.repo.owner}/{result.repo.name}"
+        with self._lock:
+            if result.coverage_percentage is not None:
+                if self._entries.pop(repo_name, None) is None:
+                    return
+            elif result.error and result.error.startswith("No coverage data found"):
+                entry = self._entries.get(repo_name)
+                misses = entry.misses + 1 if entry else 1
+                backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (misses - 1))
+                self._entries[repo_name] = NegativeEntry(misses, time.time() + backoff)
+            else:
+                return
+            due = self._updated()
+        if due:
+            self.save()
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {repo: asdict(entry) for repo, entry in self._entries.items()}
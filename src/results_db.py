@@ -0,0 +1,142 @@
+"""
+SQLite results backend with history, indexes and in-database aggregation
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+from src.host_health import UNAVAILABLE_ERROR_PREFIX
+
+DEFAULT_DB_FILE = "coverage_results.db"
+
+_COLUMNS = (
+    "repo",
+    "url",
+    "stars",
+    "language",
+    "coverage",
+    "total_lines",
+    "source",
+    "error",
+    "timestamp",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    url TEXT,
+    stars INTEGER,
+    language TEXT,
+    coverage REAL,
+    total_lines INTEGER,
+    source TEXT,
+    error TEXT,
+    timestamp TEXT NOT NULL,
+    UNIQUE (repo, timestamp)
+);
+CREATE INDEX IF NOT EXISTS idx_results_repo ON results (repo, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_language ON results (language);
+CREATE INDEX IF NOT EXISTS idx_results_source ON results (source);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+"""
+
+# Latest observation per repo, then nearest-rank percentiles per language
+_REPORT_QUERY = """
+WITH latest AS (
+    SELECT language, coverage, stars
+    FROM (
+        SELECT language, coverage, stars,
+               ROW_NUMBER() OVER (PARTITION BY repo ORDER BY timestamp DESC) AS recency
+        FROM results
+        WHERE timestamp >= :since
+    )
+    WHERE recency = 1 AND coverage IS NOT NULL AND stars >= :min_stars
+),
+ranked AS (
+    SELECT language, coverage,
+           ROW_NUMBER() OVER (PARTITION BY language ORDER BY coverage) AS position,
+           COUNT(*) OVER (PARTITION BY language) AS total
+    FROM latest
+)
+SELECT language,
+       total,
+       AVG(coverage),
+       MAX(CASE WHEN position = (25 * total + 99) / 100 THEN coverage END),
+       MAX(CASE WHEN position = (50 * total + 99) / 100 THEN coverage END),
+       MAX(CASE WHEN position = (90 * total + 99) / 100 THEN coverage END)
+FROM ranked
+GROUP BY language, total
+ORDER BY total DESC, language
+"""
+
+
+@dataclass
+class LanguageReport:
+    language: str
+    repos: int
+    mean: float
+    p25: float
+    median: float
+    p90: float
+
+
+class SqliteResultStore:
+    """Results table keeping every observation of a repo, not just the latest"""
+
+    def __init__(self, path: str = DEFAULT_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _insert(self, records: Iterable[dict[str, Any]]) -> int:
+        rows = (tuple(record.get(column) for column in _COLUMNS) for record in records)
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                f"INSERT OR IGNORE INTO results ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                rows,
+            )
+            return cursor.rowcount
+
+    def append(self, record: dict[str, Any]) -> None:
+        self._insert([record])
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """Insert records, skipping ones already present; returns how many were new"""
+        return self._insert(records)
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM results ORDER BY id"
+        )
+        for row in cursor:
+            yield dict(zip(_COLUMNS, row))
+
+    def iter_repo_names(self) -> Iterator[str]:
+        """Repos with at least one result that is not a "source unavailable" retry"""
+        cursor = self._conn.execute(
+            "SELECT DISTINCT repo FROM results "
+            "WHERE error IS NULL OR error NOT LIKE ?",
+            (f"{UNAVAILABLE_ERROR_PREFIX}%",),
+        )
+        for (repo,) in cursor:
+            yield repo
+
+    def report(
+        self, min_stars: int = 0, since: Optional[str] = None
+    ) -> list[LanguageReport]:
+        """Per-language mean and percentiles of each repo's latest coverage"""
+        with self._lock:
+            rows = self._conn.execute(
+                _REPORT_QUERY, {"min_stars": min_stars, "since": since or ""}
+            ).fetchall()
+        return [LanguageReport(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,172 @@
+"""
+Append-only JSON Lines store for coverage results
+"""
+
+import json
+import os
+import threading
+from typing import Any, Iterable, Iterator, Protocol
+
+from src.host_health import is_unavailable_record
+from src.json_state import unique_tmp_path
+from src.models import CoverageResult
+
+RESULTS_FILE = "coverage_results.jsonl"
+LEGACY_RESULTS_FILE = "coverage_results.json"
+
+# Multi-node runs write one file per worker; `python main.py merge` combines them
+WORKER_RESULTS_PATTERN = "coverage_results.*.jsonl"
+
+
+def worker_results_file(worker_id: str) -> str:
+    return f"coverage_results.{worker_id}.jsonl"
+
+
+def result_to_record(result: CoverageResult) -> dict[str, Any]:
+    """Flatten a CoverageResult into the record format saved on disk"""
+    return {
+        "repo": f"{result.repo.owner}/{result.repo.name}",
+        "url": result.url,
+        "stars": result.repo.stars,
+        "language": result.repo.language,
+        "coverage": result.coverage_percentage,
+        "total_lines": result.total_lines,
+        "source": result.source,
+        "error": result.error,
+        "timestamp": result.timestamp,
+    }
+
+
+def write_legacy_json(records: Iterable[dict[str, Any]], path: str) -> int:
+    """Write records as the legacy indented JSON array, one record at a time"""
+    count = 0
+    tmp_path = unique_tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for record in records:
+            body = json.dumps(record, indent=2).replace("\n", "\n  ")
+            f.write(("," if count else "") + "\n  " + body)
+            count += 1
+        f.write("\n]" if count else "]")
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_records(path: str) -> Iterator[dict[str, Any]]:
+    """Read records from a legacy JSON array file or a JSON Lines file"""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+    if first == "[":
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        yield from JsonlResultStore(path).iter_records()
+
+
+def merge_records(
+    store: "ResultStore", sources: Iterable[Iterable[dict[str, Any]]]
+) -> int:
+    """Add the latest record of each repo found in sources to store, unless store
+    already has that record or a newer one; returns how many were added
+
+    When a lease expired under a slow worker, two workers may have extracted the same
+    repo; only the newer of those results is kept. Merging the same files again adds
+    nothing.
+    """
+    newest: dict[str, str] = {}
+    for record in store.iter_records():
+        repo, timestamp = record.get("repo"), record.get("timestamp") or ""
+        if repo and timestamp > newest.get(repo, ""):
+            newest[repo] = timestamp
+    latest: dict[str, dict[str, Any]] = {}
+    for records in sources:
+        for record in records:
+            repo = record.get("repo")
+            if not repo or (record.get("timestamp") or "") <= newest.get(repo, ""):
+                continue
+            if repo not in latest or record["timestamp"] > latest[repo]["timestamp"]:
+                latest[repo] = record
+    return store.import_records(latest.values())
+
+
+class ResultStore(Protocol):
+    """Where main() saves results and looks up which repos it has already seen"""
+
+    def append(self, record: dict[str, Any]) -> None: ...
+
+    def iter_records(self) -> Iterator[dict[str, Any]]: ...
+
+    def iter_repo_names(self) -> Iterator[str]: ...
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int: ...
+
+
+class JsonlResultStore:
+    """One JSON record per line, each appended and fsynced as soon as it is produced"""
+
+    def __init__(self, path: str = RESULTS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._checked_tail = False
+
+    def _repair_tail(self, f) -> None:
+        # A crash mid-write leaves a partial last line; end it so the next record
+        # starts on a fresh line and readers can skip the fragment
+        if self._checked_tail:
+            return
+        self._checked_tail = True
+        if f.tell() == 0:
+            return
+        with open(self.path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                f.write("\n")
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                self._repair_tail(f)
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """Stream records from disk, skipping lines left incomplete by a crash"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+    def iter_repo_names(self) -> Iterator[str]:
+        """Repos with a result that is not a "source unavailable" retry (may repeat)"""
+        for record in self.iter_records():
+            if "repo" in record and not is_unavailable_record(record):
+                yield record["repo"]
+
+    def import_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """Append records with a single fsync, returning how many were written"""
+        count = 0
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as out:
+                self._repair_tail(out)
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+                out.flush()
+                os.fsync(out.fileno())
+        return count
+
+    def import_legacy(self, path: str = LEGACY_RESULTS_FILE) -> int:
+        """Append every record of a legacy JSON array file, returning how many were copied"""
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        return self.import_records(records)
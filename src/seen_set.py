@@ -0,0 +1,127 @@
+"""
+Compact membership sets for the repo names a run has already collected
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from heapq import merge
+from typing import Iterable, Protocol
+
+# Names are added to a plain set first and folded into the sorted array in batches of
+# at least this many, or an eighth of the array, so merging stays cheap overall
+MIN_PENDING = 1 << 16
+
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+
+
+def _digest(name: str, size: int) -> bytes:
+    return blake2b(name.encode("utf-8"), digest_size=size).digest()
+
+
+class NameSet(Protocol):
+    """What main() needs to know which repos already have results"""
+
+    def add(self, name: str) -> None: ...
+
+    def update(self, names: Iterable[str]) -> None: ...
+
+    def __contains__(self, name: object) -> bool: ...
+
+    def __len__(self) -> int: ...
+
+
+class HashedNameSet:
+    """Set of names kept as 64-bit hashes in a sorted array, 8 bytes per name
+
+    A set of str costs over 100 bytes per repo name. Two names sharing a 64-bit hash
+    would make one look collected; at a million names the odds of any such pair are
+    about 3 in 100 million.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._sorted = array("Q")
+        self._pending: set[int] = set()
+        self.update(names)
+
+    @staticmethod
+    def _hash(name: str) -> int:
+        return int.from_bytes(_digest(name, 8), "little")
+
+    def _in_sorted(self, value: int) -> bool:
+        index = bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def add(self, name: str) -> None:
+        value = self._hash(name)
+        if value in self._pending or self._in_sorted(value):
+            return
+        self._pending.add(value)
+        if len(self._pending) >= max(MIN_PENDING, len(self._sorted) // 8):
+            self._merge()
+
+    def update(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.add(name)
+
+    def _merge(self) -> None:
+        self._sorted = array("Q", merge(self._sorted, sorted(self._pending)))
+        self._pending = set()
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        value = self._hash(name)
+        return value in self._pending or self._in_sorted(value)
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+
+class BloomNameSet:
+    """Bloom filter over names: fixed memory, sized up front for `capacity` names
+
+    About 1.8 bytes per name at the default 0.1% error rate. A false positive makes
+    main() skip a repo as already collected, so this trades a few missed repos for
+    memory on crawls too large for HashedNameSet. The length counts names that were
+    not already present when added, so it can run slightly low.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_BLOOM_ERROR_RATE):
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._bits = bytearray((bits + 7) // 8)
+        self._size = len(self._bits) * 8
+        self._hashes = max(1, round(bits / max(1, capacity) * math.log(2)))
+        self._count = 0
+
+    def _positions(self, name: str) -> list[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = _digest(name, 16)
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self._size for i in range(self._hashes)]
+
+    def add(self, name: str) -> None:
+        added = False
+        for position in self._positions(name):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        self._count += added
+
+    def update(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(name)
+        )
+
+    def __len__(self) -> int:
+        return self._count
@@ -0,0 +1,241 @@
+"""
+Long-running HTTP/JSON service for on-demand coverage lookups with warm connections and caches
+
+    GET  /coverage/{owner}/{name}   one repo
+    POST /coverage/batch            {"repos": ["owner/name", ...]}
+    GET  /health                    cache and lookup counters
+"""
+
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from src.concurrency import captured_output
+from src.extract_coverage import DEFAULT_RACE_DEADLINE, extract_coverage_smart
+from src.models import RepoInfo
+from src.results_store import result_to_record
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8321
+
+# Seconds a looked-up result is served from memory before it is extracted again
+DEFAULT_RESULT_TTL = 15 * 60
+DEFAULT_MAX_RESULTS = 4096
+
+# Repos looked up concurrently for batch requests
+BATCH_THREADS = 16
+MAX_BATCH_SIZE = 500
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    cache_hits: int = 0
+    lookups: int = 0
+    collapsed: int = 0
+
+
+class ResultCache:
+    """In-memory LRU of result records, each fresh for `ttl` seconds"""
+
+    def __init__(
+        self, ttl: float = DEFAULT_RESULT_TTL, maxsize: int = DEFAULT_MAX_RESULTS
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_repo_name(value: str) -> Optional[str]:
+    """Normalise "owner/name"; None if value is not of that form"""
+    owner, _, name = value.strip().strip("/").partition("/")
+    if not owner or not name or "/" in name:
+        return None
+    return f"{owner}/{name}"
+
+
+class CoverageService:
+    """Wraps extract_coverage_smart with a result cache and single-flight lookups
+
+    Concurrent requests for the same repo wait on one shared lookup instead of each
+    starting their own.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_RESULT_TTL,
+        maxsize: int = DEFAULT_MAX_RESULTS,
+        race: bool = False,
+        deadline: float = DEFAULT_RACE_DEADLINE,
+    ):
+        self.cache = ResultCache(ttl, maxsize)
+        self.race = race
+        self.deadline = deadline
+        self.stats = ServiceStats()
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=BATCH_THREADS, thread_name_prefix="batch"
+        )
+
+    def _extract(self, repo_name: str) -> dict[str, Any]:
+        owner, name = repo_name.split("/", 1)
+        repo = RepoInfo(
+            owner=owner,
+            name=name,
+            stars=0,
+            language="Unknown",
+            clone_url=f"https://github.com/{repo_name}.git",
+        )
+        # Progress lines are meant for the terminal, not for the service log
+        with captured_output(io.StringIO()):
+            result = extract_coverage_smart(
+                repo, race=self.race, deadline=self.deadline
+            )
+        return result_to_record(result)
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.stats.requests += 1
+
+    def lookup(self, repo_name: str) -> dict[str, Any]:
+        key = repo_name.lower()
+        record = self.cache.get(key)
+        if record is not None:
+            with self._lock:
+                self.stats.cache_hits += 1
+            return {**record, "cached": True}
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats.lookups += 1
+            else:
+                self.stats.collapsed += 1
+        assert future is not None
+
+        if leader:
+            try:
+                record = self._extract(repo_name)
+                self.cache.put(key, record)
+                future.set_result(record)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+        return {**future.result(), "cached": False}
+
+    def lookup_many(self, repo_names: list[str]) -> list[dict[str, Any]]:
+        return list(self._batch_executor.map(self.lookup, repo_names))
+
+    def health(self) -> dict[str, Any]:
+        with self._lock:
+            stats = asdict(self.stats)
+            stats["in_flight"] = len(self._in_flight)
+        stats["cached_results"] = len(self.cache)
+        return stats
+
+
+class CoverageRequestHandler(BaseHTTPRequestHandler):
+    service: CoverageService
+
+    def _send_json(self, status: int, body: Any) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.service.count_request()
+        path = self.path.split("?", 1)[0]
+        if path == "/health":
+            self._send_json(200, self.service.health())
+            return
+        if not path.startswith("/coverage/"):
+            self._send_json(404, {"error": f"Unknown path {path}"})
+            return
+        repo_name = parse_repo_name(path[len("/coverage/") :])
+        if repo_name is None:
+            self._send_json(400, {"error": "Expected /coverage/{owner}/{name}"})
+            return
+        try:
+            self._send_json(200, self.service.lookup(repo_name))
+        except Exception as e:
+            self._send_json(500, {"repo": repo_name, "error": str(e)})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self.service.count_request()
+        if self.path.split("?", 1)[0] != "/coverage/batch":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            repos = json.loads(self.rfile.read(length) or b"{}").get("repos")
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": 'Expected a JSON body {"repos": [...]}'})
+            return
+        if not isinstance(repos, list) or not all(isinstance(r, str) for r in repos):
+            self._send_json(400, {"error": '"repos" must be a list of owner/name'})
+            return
+        if len(repos) > MAX_BATCH_SIZE:
+            self._send_json(400, {"error": f"At most {MAX_BATCH_SIZE} repos per batch"})
+            return
+        names = [parse_repo_name(r) for r in repos]
+        invalid = [r for r, name in zip(repos, names) if name is None]
+        if invalid:
+            self._send_json(400, {"error": f"Not an owner/name: {invalid[0]}"})
+            return
+        try:
+            results = self.service.lookup_many([n for n in names if n is not None])
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"results": results})
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        print(f"🌐 {self.address_string()} {format % args}")
+
+
+def make_server(
+    service: CoverageService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    handler = type(
+        "BoundCoverageRequestHandler", (CoverageRequestHandler,), {"service": service}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,246 @@
+"""
+Deterministic star-range sharded crawl of GitHub search with a resumable cursor
+"""
+
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+
+from src.get_top_repos import repo_from_search_item
+from src.host_health import HostUnavailableError
+from src.http_client import http_get
+from src.json_state import save_json_state
+from src.metrics import stage
+from src.models import RepoInfo
+
+# Load environment variables from .env file
+load_dotenv()
+
+SEARCH_URL = "https://api.github.com/search/repositories"
+DEFAULT_CURSOR_FILE = "crawl_cursor.json"
+
+# GitHub search returns at most 1000 results (10 pages of 100) per query
+MAX_RESULTS_PER_QUERY = 1000
+PER_PAGE = 100
+
+
+class SearchError(Exception):
+    pass
+
+
+@dataclass
+class StarShard:
+    low: int
+    high: int
+    total: int
+
+    @property
+    def query(self) -> str:
+        return f"stars:{self.low}..{self.high}"
+
+    @property
+    def pages(self) -> int:
+        results = min(self.total, MAX_RESULTS_PER_QUERY)
+        return (results + PER_PAGE - 1) // PER_PAGE
+
+
+@dataclass
+class CrawlCursor:
+    """Shard plan plus the position of the first repo not yet confirmed as processed"""
+
+    min_stars: int
+    shards: list[StarShard] = field(default_factory=list)
+    shard: int = 0
+    offset: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CrawlCursor"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["shards"] = [StarShard(**shard) for shard in data["shards"]]
+            return cls(**data)
+        except (ValueError, KeyError, TypeError, IOError):
+            return None
+
+    def save(self, path: str) -> None:
+        save_json_state(path, asdict(self), indent=2)
+
+    @property
+    def finished(self) -> bool:
+        return self.shard >= len(self.shards)
+
+
+def _search(query: str, page: int, per_page: int) -> dict:
+    url = (
+        f"{SEARCH_URL}?q={query}&sort=stars&order=desc&page={page}&per_page={per_page}"
+    )
+    with stage("search"):
+        response = http_get(url, timeout=30)
+    if response.status_code != 200:
+        raise SearchError(
+            f"GitHub search failed for {query} page {page}: {response.status_code}"
+        )
+    return response.json()
+
+
+def plan_shards(min_stars: int) -> list[StarShard]:
+    """Split stars >= min_stars into ranges that each hold at most 1000 repos
+
+    Ranges are split in half until the search total_count fits, and are returned from
+    the most starred down. A single star value with more than 1000 repos cannot be
+    split further and is crawled as far as the API allows.
+    """
+    top = _search(f"stars:>={min_stars}", 1, 1)
+    if not top["items"]:
+        return []
+    pending = [(min_stars, top["items"][0]["stargazers_count"])]
+    shards: list[StarShard] = []
+    while pending:
+        low, high = pending.pop()
+        total = _search(f"stars:{low}..{high}", 1, 1)["total_count"]
+        if total <= MAX_RESULTS_PER_QUERY or low == high:
+            if total > MAX_RESULTS_PER_QUERY:
+                print(
+                    f"⚠️  {total:,} repos have exactly {low:,} stars; "
+                    f"only the first {MAX_RESULTS_PER_QUERY} can be crawled"
+                )
+            if total:
+                shards.append(StarShard(low, high, total))
+            continue
+        middle = (low + high) // 2
+        pending.append((low, middle))
+        pending.append((middle + 1, high))
+    shards.sort(key=lambda shard: shard.high, reverse=True)
+
+    # Halving leaves many sparse ranges at the top; join neighbours that fit in one query
+    merged: list[StarShard] = []
+    for shard in shards:
+        if merged and merged[-1].total + shard.total <= MAX_RESULTS_PER_QUERY:
+            merged[-1] = StarShard(
+                shard.low, merged[-1].high, merged[-1].total + shard.total
+            )
+        else:
+            merged.append(shard)
+    shards = merged
+    print(f"🗺️  Planned {len(shards)} star-range shards covering stars >= {min_stars}")
+    return shards
+
+
+class ShardedCrawler:
+    """Yields repos shard by shard, fetching upcoming search pages in parallel
+
+    The cursor only advances when the caller confirms a repo with mark_processed, so a
+    crash re-offers unconfirmed repos on the next run instead of dropping them.
+    """
+
+    def __init__(
+        self,
+        min_stars: int = 1000,
+        skip_repos: list[str] | None = None,
+        prefer_code_langs: bool = True,
+        cursor_path: str = DEFAULT_CURSOR_FILE,
+        parallel_pages: int = 4,
+    ):
+        self.min_stars = min_stars
+        self.skip_repos = skip_repos or []
+        self.prefer_code_langs = prefer_code_langs
+        self.cursor_path = cursor_path
+        self.parallel_pages = parallel_pages
+        # (repo, (shard index, offset)) in crawl order, from the cursor to the newest
+        # yielded repo; repos the caller skips are dropped once a later one is processed
+        self._positions: deque[tuple[str, tuple[int, int]]] = deque()
+
+        self.planned = True
+        cursor = CrawlCursor.load(cursor_path)
+        if cursor is None or cursor.min_stars != min_stars:
+            try:
+                cursor = CrawlCursor(min_stars, plan_shards(min_stars))
+                cursor.save(cursor_path)
+            except (HostUnavailableError, SearchError) as e:
+                print(f"⚠️  Could not plan the crawl ({e}), stopping discovery")
+                cursor = CrawlCursor(min_stars, [])
+                self.planned = False
+        elif not cursor.finished:
+            print(
+                f"↪️  Resuming crawl at shard {cursor.shard + 1}/{len(cursor.shards)} "
+                f"({cursor.shards[cursor.shard].query}), offset {cursor.offset}"
+            )
+        self.cursor = cursor
+
+    def _page_tasks(self) -> Iterator[tuple[int, int, int]]:
+        """(shard index, page, items to skip) from the cursor to the end of the plan"""
+        offset = self.cursor.offset
+        for index in range(self.cursor.shard, len(self.cursor.shards)):
+            shard = self.cursor.shards[index]
+            first_page = offset // PER_PAGE + 1
+            for page in range(first_page, shard.pages + 1):
+                yield index, page, offset % PER_PAGE if page == first_page else 0
+            offset = 0
+
+    def __iter__(self) -> Iterator[RepoInfo]:
+        if not self.planned:
+            return
+        if self.cursor.finished:
+            print(f"🏁 Crawl complete; delete {self.cursor_path} to start a new one")
+            return
+
+        tasks = self._page_tasks()
+        pending: deque[tuple[int, int, int, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self.parallel_pages) as executor:
+
+            def submit_next() -> None:
+                task = next(tasks, None)
+                if task is not None:
+                    index, page, skip = task
+                    query = self.cursor.shards[index].query
+                    future = executor.submit(_search, query, page, PER_PAGE)
+                    pending.append((index, page, skip, future))
+
+            for _ in range(self.parallel_pages):
+                submit_next()
+            while pending:
+                index, page, skip, future = pending.popleft()
+                submit_next()
+                try:
+                    items = future.result()["items"]
+                except (HostUnavailableError, SearchError) as e:
+                    # The cursor has not moved past this page, so the next run retries it
+                    print(f"⚠️  {e}, stopping discovery")
+                    for _, _, _, later in pending:
+                        later.cancel()
+                    return
+                for position, item in enumerate(
+                    items[skip:], (page - 1) * PER_PAGE + skip
+                ):
+                    repo = repo_from_search_item(
+                        item, self.skip_repos, self.prefer_code_langs
+                    )
+                    if repo is not None:
+                        self._positions.append(
+                            (f"{repo.owner}/{repo.name}", (index, position))
+                        )
+                        yield repo
+
+    def mark_processed(self, repo: RepoInfo) -> None:
+        """Move the saved cursor past repo (and everything before it)"""
+        repo_name = f"{repo.owner}/{repo.name}"
+        if all(name != repo_name for name, _ in self._positions):
+            return
+        while True:
+            name, (index, offset) = self._positions.popleft()
+            if name == repo_name:
+                break
+        offset += 1
+        if offset >= min(self.cursor.shards[index].total, MAX_RESULTS_PER_QUERY):
+            index, offset = index + 1, 0
+        if (index, offset) > (self.cursor.shard, self.cursor.offset):
+            self.cursor.shard, self.cursor.offset = index, offset
+            self.cursor.save(self.cursor_path)
@@ -0,0 +1,189 @@
+"""
+Per-(source, language) hit rates and latencies, used to order coverage lookups per repo
+"""
+
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from src.json_state import JsonStateFile, load_json_state
+
+DEFAULT_STATS_FILE = "source_stats.json"
+
+# Pooled statistics over every language, used until a language has enough attempts
+ALL_LANGUAGES = "*"
+MIN_LANGUAGE_ATTEMPTS = 10
+
+# Seconds a lookup is assumed to take before any have been timed
+DEFAULT_COST = 1.0
+
+# A source is skipped for a language after this many attempts below this hit rate...
+SKIP_MIN_ATTEMPTS = 30
+SKIP_HIT_RATE = 0.02
+# ...except for this share of repos, so its statistics keep up if things change
+EXPLORE_RATE = 0.05
+
+
+@dataclass
+class SourceRecord:
+    attempts: int = 0
+    hits: int = 0
+    timed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        # Laplace smoothing: untried sources start at 50%
+        return (self.hits + 1) / (self.attempts + 2)
+
+    @property
+    def cost(self) -> float:
+        return self.seconds / self.timed if self.timed else DEFAULT_COST
+
+
+@dataclass
+class PlanStats:
+    repos: int = 0
+    reordered: int = 0
+    skipped_lookups: int = 0
+    seconds_saved: float = 0.0
+    lookups_saved: float = 0.0
+
+
+def _expected(order: Sequence[SourceRecord]) -> tuple[float, float]:
+    """Expected (seconds, lookups) to go through order until the first hit"""
+    reach = 1.0
+    seconds = lookups = 0.0
+    for record in order:
+        seconds += reach * record.cost
+        lookups += reach
+        reach *= 1 - record.hit_rate
+    return seconds, lookups
+
+
+class SourceStats(JsonStateFile):
+    """Persistent hit-rate and latency table keyed by (source, language)"""
+
+    # Every lookup is an update, so save less often than per-repo state
+    save_every = 50
+
+    def __init__(self, path: str = DEFAULT_STATS_FILE, seed: Optional[int] = None):
+        super().__init__(path)
+        self.plan_stats = PlanStats()
+        self._random = random.Random(seed)
+        self._table: dict[str, dict[str, SourceRecord]] = load_json_state(
+            path,
+            lambda data: {
+                source: {lang: SourceRecord(**r) for lang, r in langs.items()}
+                for source, langs in data.items()
+            },
+            {},
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not self._table
+
+    def _record(self, source: str, language: str) -> SourceRecord:
+        return self._table.setdefault(source, {}).setdefault(language, SourceRecord())
+
+    def _estimate(self, source: str, language: str) -> SourceRecord:
+        by_language = self._table.get(source, {})
+        record = by_language.get(language)
+        if record is not None and record.attempts >= MIN_LANGUAGE_ATTEMPTS:
+            return record
+        return by_language.get(ALL_LANGUAGES) or SourceRecord()
+
+    def _count(
+        self, source: str, language: str, hit: bool, seconds: Optional[float]
+    ) -> None:
+        for key in {language, ALL_LANGUAGES}:
+            record = self._record(source, key)
+            record.attempts += 1
+            record.hits += hit
+            if seconds is not None:
+                record.timed += 1
+                record.seconds += seconds
+
+    def record(self, source: str, language: str, hit: bool, seconds: float) -> None:
+        """Count one timed lookup of source for a repo in language (pooled as well)"""
+        with self._lock:
+            self._count(source, language, hit, seconds)
+            due = self._updated()
+        if due:
+            self.save()
+
+    def bootstrap(
+        self,
+        records: Iterable[dict[str, Any]],
+        sources_tried: Callable[[dict[str, Any]], Optional[Sequence[str]]],
+    ) -> int:
+        """Seed hit rates from stored results; returns how many results were used
+
+        sources_tried gives the sources that ran for a result, in order (None if that
+        cannot be told): all of them missed except the last, which found the coverage
+        if the result has any. Sources that never ran for a result are not counted.
+        Timings are not stored with results and are learned as lookups run.
+        """
+        used = 0
+        with self._lock:
+            for record in records:
+                tried = sources_tried(record)
+                if not tried:
+                    continue
+                language = record.get("language") or "Unknown"
+                hit = record.get("coverage") is not None
+                for missed in tried[:-1]:
+                    self._count(missed, language, False, None)
+                self._count(tried[-1], language, hit, None)
+                used += 1
+        return used
+
+    def plan(self, sources: Sequence[str], language: str) -> list[str]:
+        """sources in the order with the least expected time to a hit, unpromising ones dropped
+
+        Sorting by cost / hit rate minimises the expected time when lookups run one
+        after another until the first hit. A dropped source picked for exploration
+        goes first, since behind the others it would rarely get to run at all.
+        """
+        with self._lock:
+            estimates = {s: self._estimate(s, language) for s in sources}
+            dropped = [
+                s
+                for s in sources
+                if estimates[s].attempts >= SKIP_MIN_ATTEMPTS
+                and estimates[s].hit_rate < SKIP_HIT_RATE
+            ]
+            explored = [s for s in dropped if self._random.random() < EXPLORE_RATE]
+            order = explored + sorted(
+                (s for s in sources if s not in dropped),
+                key=lambda s: estimates[s].cost / estimates[s].hit_rate,
+            )
+            default_seconds, default_lookups = _expected(
+                [estimates[s] for s in sources]
+            )
+            seconds, lookups = _expected([estimates[s] for s in order])
+            self.plan_stats.repos += 1
+            self.plan_stats.reordered += order != list(sources)
+            self.plan_stats.skipped_lookups += len(sources) - len(order)
+            self.plan_stats.seconds_saved += default_seconds - seconds
+            self.plan_stats.lookups_saved += default_lookups - lookups
+        return order
+
+    def _snapshot(self) -> dict[str, Any]:
+        return {
+            source: {lang: asdict(r) for lang, r in langs.items()}
+            for source, langs in self._table.items()
+        }
+
+
+_stats: Optional[SourceStats] = None
+
+
+def enable_adaptive_order(stats: Optional[SourceStats]) -> None:
+    global _stats  # pylint: disable=global-statement
+    _stats = stats
+
+
+def get_source_stats() -> Optional[SourceStats]:
+    return _stats